@@ -4,18 +4,35 @@ Learns from past booking patterns to predict future demand
 "Mondays at 9 AM always have high traffic"
 """
 
+import numpy as np
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 import logging
+import time
 
-from app.models.booking_request import BookingRequest
-from app.models.ride_group import RideGroup, GroupStatus
+from app.models.ride_group import BookingRequest, RideGroup, GroupStatus
 from app.models.historical_data import HistoricalArrivalData
 
 logger = logging.getLogger(__name__)
 
+# In-process TTL cache for arrival probabilities, shared across learner
+# instances. The underlying data only changes when the hour rolls over
+# or the nightly rebuild runs, so repeated scheduler calls within the
+# same hour can skip the database entirely.
+# Maps (route_id, day_of_week, hour_of_day) -> (expires_at, probability)
+_ARRIVAL_PROB_CACHE: Dict[Tuple[int, int, int], Tuple[float, float]] = {}
+_ARRIVAL_PROB_CACHE_TTL_SECONDS = 3600
+
+_DAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+# Score lookup tables - a searchsorted probe replaces the if/elif ladder
+_FREQ_THRESHOLDS = np.array([1.0, 2.0, 3.0])
+_FREQ_SCORES = np.array([20, 40, 60, 70])
+_WAIT_THRESHOLDS_MIN = np.array([2.0, 5.0, 10.0])
+_WAIT_SCORES = np.array([30, 20, 10, 5])
+
 
 class HistoricalLearner:
     """
@@ -39,30 +56,36 @@ class HistoricalLearner:
         
         day_of_week = current_time.weekday() + 1  # 1=Monday, 7=Sunday
         hour_of_day = current_time.hour
-        
+
+        # Check the in-process cache first (hot path for the scheduler)
+        cache_key = (route_id, day_of_week, hour_of_day)
+        cached = _ARRIVAL_PROB_CACHE.get(cache_key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
         # Find matching historical data
-        historical_data = self.db.query(HistoricalArrivalData).filter(
-            and_(
-                HistoricalArrivalData.route_id == route_id,
-                HistoricalArrivalData.day_of_week == day_of_week,
-                HistoricalArrivalData.hour_of_day == hour_of_day
-            )
-        ).first()
-        
+        historical_data = self._fetch_historical(route_id, day_of_week, hour_of_day)
+
         if historical_data:
-            probability = historical_data.arrival_probability_score
-            logger.debug(
-                f"Historical probability for route {route_id} "
-                f"on {self._day_name(day_of_week)} at {hour_of_day}:00 = {probability}%"
+            probability = float(historical_data.arrival_probability_score)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"Historical probability for route {route_id} "
+                    f"on {self._day_name(day_of_week)} at {hour_of_day}:00 = {probability}%"
+                )
+        else:
+            # No historical data - return neutral probability
+            logger.warning(
+                f"No historical data for route {route_id}, "
+                f"day {day_of_week}, hour {hour_of_day}"
             )
-            return float(probability)
-        
-        # No historical data - return neutral probability
-        logger.warning(
-            f"No historical data for route {route_id}, "
-            f"day {day_of_week}, hour {hour_of_day}"
+            probability = 50.0  # Default neutral
+
+        _ARRIVAL_PROB_CACHE[cache_key] = (
+            time.monotonic() + _ARRIVAL_PROB_CACHE_TTL_SECONDS,
+            probability
         )
-        return 50.0  # Default neutral
+        return probability
     
     def build_historical_data(
         self,
@@ -79,98 +102,164 @@ class HistoricalLearner:
         logger.info(f"Building historical data for route {route_id} (last {lookback_days} days)")
         
         cutoff_date = datetime.utcnow() - timedelta(days=lookback_days)
-        
-        # Get all bookings in the lookback period
-        bookings = self.db.query(BookingRequest).filter(
+
+        # Aggregate bookings per (day-of-week, hour) bucket in SQL
+        # instead of shipping every booking row to Python
+        bucket_rows = self.db.query(
+            func.extract('dow', BookingRequest.requested_at).label('dow'),
+            func.extract('hour', BookingRequest.requested_at).label('hour'),
+            func.count().label('total_bookings'),
+            func.avg(
+                func.extract('epoch', BookingRequest.grouped_at - BookingRequest.requested_at)
+            ).label('avg_wait_seconds')
+        ).filter(
             and_(
                 BookingRequest.route_id == route_id,
                 BookingRequest.requested_at >= cutoff_date
             )
-        ).all()
-        
-        logger.info(f"Processing {len(bookings)} bookings")
-        
-        # Group bookings by day-of-week and hour
-        time_buckets = {}
-        
-        for booking in bookings:
-            day = booking.requested_at.weekday() + 1
-            hour = booking.requested_at.hour
-            time_slot = f"{hour:02d}:00-{hour:02d}:30"
-            
-            key = (day, hour, time_slot)
-            
-            if key not in time_buckets:
-                time_buckets[key] = []
-            
-            time_buckets[key].append(booking)
-        
+        ).group_by('dow', 'hour').all()
+
+        return self._apply_bucket_rows(route_id, bucket_rows, lookback_days)
+
+    def build_historical_data_all_routes(
+        self,
+        route_ids: List[int],
+        lookback_days: int = 30
+    ) -> Dict[int, Dict[str, int]]:
+        """
+        Build/update historical data for many routes with ONE aggregate
+        query (route_id joins the GROUP BY), then partition the buckets
+        per route in Python. Used by the nightly rebuild so its cost
+        scales with one indexed scan instead of one query per route.
+
+        Returns: {route_id: per-route stats}
+        """
+
+        cutoff_date = datetime.utcnow() - timedelta(days=lookback_days)
+
+        bucket_rows = self.db.query(
+            BookingRequest.route_id.label('route_id'),
+            func.extract('dow', BookingRequest.requested_at).label('dow'),
+            func.extract('hour', BookingRequest.requested_at).label('hour'),
+            func.count().label('total_bookings'),
+            func.avg(
+                func.extract('epoch', BookingRequest.grouped_at - BookingRequest.requested_at)
+            ).label('avg_wait_seconds')
+        ).filter(
+            and_(
+                BookingRequest.route_id.in_(route_ids),
+                BookingRequest.requested_at >= cutoff_date
+            )
+        ).group_by(BookingRequest.route_id, 'dow', 'hour').all()
+
+        # Partition buckets per route
+        rows_by_route: Dict[int, list] = {route_id: [] for route_id in route_ids}
+        for row in bucket_rows:
+            rows_by_route[row.route_id].append(row)
+
+        # Routes with no bookings in the window have nothing to upsert -
+        # skip their existing-records query and commit entirely
+        empty_stats = {
+            "records_created": 0,
+            "records_updated": 0,
+            "total_bookings_processed": 0,
+            "time_buckets": 0
+        }
+        return {
+            route_id: (
+                self._apply_bucket_rows(route_id, rows, lookback_days)
+                if rows else dict(empty_stats)
+            )
+            for route_id, rows in rows_by_route.items()
+        }
+
+    def _apply_bucket_rows(
+        self,
+        route_id: int,
+        bucket_rows: list,
+        lookback_days: int
+    ) -> Dict[str, int]:
+        """Turn aggregate bucket rows into upserted historical records"""
+
+        total_bookings_processed = sum(row.total_bookings for row in bucket_rows)
+        logger.info(f"Processing {total_bookings_processed} bookings in {len(bucket_rows)} buckets")
+
+        # Load all existing records for this route in one query,
+        # keyed by packed time bucket (avoids one SELECT per bucket)
+        existing_records = {
+            record.time_bucket: record
+            for record in self.db.query(HistoricalArrivalData).filter(
+                HistoricalArrivalData.route_id == route_id
+            ).all()
+        }
+
         # Calculate statistics for each time bucket
-        records_created = 0
-        records_updated = 0
-        
-        for (day, hour, time_slot), bucket_bookings in time_buckets.items():
-            # Calculate metrics
-            total_bookings = len(bucket_bookings)
-            
+        inserts = []
+        updates = []
+
+        for row in bucket_rows:
+            # Postgres dow: 0=Sunday..6=Saturday → our scheme 1=Monday..7=Sunday
+            dow = int(row.dow)
+            day = dow if dow >= 1 else 7
+            hour = int(row.hour)
+            time_slot = f"{hour:02d}:00-{hour:02d}:30"
+
+            total_bookings = row.total_bookings
+
             # Average bookings per 30-min window
             days_in_period = lookback_days / 7  # Approximate weeks
             avg_bookings_per_30min = total_bookings / days_in_period if days_in_period > 0 else 0
-            
-            # Calculate average wait time
-            wait_times = []
-            for booking in bucket_bookings:
-                if booking.grouped_at:
-                    wait_seconds = (booking.grouped_at - booking.requested_at).total_seconds()
-                    wait_times.append(wait_seconds)
-            
-            avg_wait_time = sum(wait_times) / len(wait_times) if wait_times else 0
-            
+
+            # Average wait time (AVG ignores bookings never grouped)
+            avg_wait_time = float(row.avg_wait_seconds or 0)
+
             # Calculate probability score
             probability_score = self._calculate_probability_score(
                 avg_bookings_per_30min,
                 avg_wait_time
             )
             
-            # Update or create historical record
-            existing = self.db.query(HistoricalArrivalData).filter(
-                and_(
-                    HistoricalArrivalData.route_id == route_id,
-                    HistoricalArrivalData.day_of_week == day,
-                    HistoricalArrivalData.hour_of_day == hour,
-                    HistoricalArrivalData.time_slot == time_slot
-                )
-            ).first()
-            
+            # Queue for bulk insert/update (flushed in one statement each below)
+            time_bucket = HistoricalArrivalData.pack_time_bucket(day, hour)
+            existing = existing_records.get(time_bucket)
+
             if existing:
-                # Update existing record
-                existing.total_bookings = total_bookings
-                existing.avg_bookings_per_30min = avg_bookings_per_30min
-                existing.avg_wait_time_seconds = int(avg_wait_time)
-                existing.arrival_probability_score = probability_score
-                records_updated += 1
+                updates.append({
+                    'id': existing.id,
+                    'total_bookings': total_bookings,
+                    'avg_bookings_per_30min': avg_bookings_per_30min,
+                    'avg_wait_time_seconds': int(avg_wait_time),
+                    'arrival_probability_score': probability_score
+                })
             else:
-                # Create new record
-                new_record = HistoricalArrivalData(
-                    route_id=route_id,
-                    day_of_week=day,
-                    hour_of_day=hour,
-                    time_slot=time_slot,
-                    total_bookings=total_bookings,
-                    avg_bookings_per_30min=avg_bookings_per_30min,
-                    avg_wait_time_seconds=int(avg_wait_time),
-                    arrival_probability_score=probability_score
-                )
-                self.db.add(new_record)
-                records_created += 1
-        
+                inserts.append({
+                    'route_id': route_id,
+                    'time_bucket': time_bucket,
+                    'day_of_week': day,
+                    'hour_of_day': hour,
+                    'time_slot': time_slot,
+                    'total_bookings': total_bookings,
+                    'avg_bookings_per_30min': avg_bookings_per_30min,
+                    'avg_wait_time_seconds': int(avg_wait_time),
+                    'arrival_probability_score': probability_score
+                })
+
+        # Write all buckets in two bulk statements instead of one per bucket
+        if inserts:
+            self.db.bulk_insert_mappings(HistoricalArrivalData, inserts)
+        if updates:
+            self.db.bulk_update_mappings(HistoricalArrivalData, updates)
+
         self.db.commit()
-        
+
+        # Fresh data invalidates any cached probabilities
+        _ARRIVAL_PROB_CACHE.clear()
+
         stats = {
-            "records_created": records_created,
-            "records_updated": records_updated,
-            "total_bookings_processed": len(bookings),
-            "time_buckets": len(time_buckets)
+            "records_created": len(inserts),
+            "records_updated": len(updates),
+            "total_bookings_processed": total_bookings_processed,
+            "time_buckets": len(bucket_rows)
         }
         
         logger.info(f"Historical data build complete: {stats}")
@@ -193,28 +282,19 @@ class HistoricalLearner:
         
         # Booking frequency component (0-70 points)
         # 0-1 bookings = 20, 1-2 = 40, 2-3 = 60, 3+ = 70
-        if avg_bookings_per_30min >= 3:
-            frequency_score = 70
-        elif avg_bookings_per_30min >= 2:
-            frequency_score = 60
-        elif avg_bookings_per_30min >= 1:
-            frequency_score = 40
-        else:
-            frequency_score = 20
-        
+        frequency_score = _FREQ_SCORES[
+            np.searchsorted(_FREQ_THRESHOLDS, avg_bookings_per_30min, side='right')
+        ]
+
         # Wait time component (0-30 points)
         # Short wait = high score (indicates quick arrivals)
+        # <2min = 30, <5 = 20, <10 = 10, else 5
         wait_minutes = avg_wait_time / 60
-        if wait_minutes < 2:
-            wait_score = 30
-        elif wait_minutes < 5:
-            wait_score = 20
-        elif wait_minutes < 10:
-            wait_score = 10
-        else:
-            wait_score = 5
-        
-        total_score = frequency_score + wait_score
+        wait_score = _WAIT_SCORES[
+            np.searchsorted(_WAIT_THRESHOLDS_MIN, wait_minutes, side='right')
+        ]
+
+        total_score = float(frequency_score + wait_score)
         
         return round(total_score, 2)
     
@@ -229,24 +309,32 @@ class HistoricalLearner:
         Returns: List of {day, hour, score}
         """
         
-        heatmap_data = self.db.query(HistoricalArrivalData).filter(
+        # Fetch only the six columns we read - skips ORM hydration
+        heatmap_rows = self.db.query(
+            HistoricalArrivalData.day_of_week,
+            HistoricalArrivalData.hour_of_day,
+            HistoricalArrivalData.time_slot,
+            HistoricalArrivalData.arrival_probability_score,
+            HistoricalArrivalData.avg_bookings_per_30min,
+            HistoricalArrivalData.avg_wait_time_seconds
+        ).filter(
             HistoricalArrivalData.route_id == route_id
         ).all()
-        
+
         result = []
-        for record in heatmap_data:
+        for day, hour, time_slot, score, avg_bookings, avg_wait_seconds in heatmap_rows:
             result.append({
-                'day_of_week': self._day_name(record.day_of_week),
-                'hour': record.hour_of_day,
-                'time_slot': record.time_slot,
-                'demand_score': record.arrival_probability_score,
-                'avg_bookings': record.avg_bookings_per_30min,
-                'avg_wait_mins': round(record.avg_wait_time_seconds / 60, 1)
+                'day_of_week': self._day_name(day),
+                'hour': hour,
+                'time_slot': time_slot,
+                'demand_score': score,
+                'avg_bookings': avg_bookings,
+                'avg_wait_mins': round(avg_wait_seconds / 60, 1)
             })
-        
+
         # Sort by demand score
         result.sort(key=lambda x: x['demand_score'], reverse=True)
-        
+
         return result
     
     def get_peak_hours(
@@ -258,21 +346,27 @@ class HistoricalLearner:
         Get top peak hours for a route
         """
         
-        peak_hours = self.db.query(HistoricalArrivalData).filter(
+        peak_hours = self.db.query(
+            HistoricalArrivalData.day_of_week,
+            HistoricalArrivalData.hour_of_day,
+            HistoricalArrivalData.time_slot,
+            HistoricalArrivalData.arrival_probability_score,
+            HistoricalArrivalData.avg_bookings_per_30min
+        ).filter(
             HistoricalArrivalData.route_id == route_id
         ).order_by(
             HistoricalArrivalData.arrival_probability_score.desc()
         ).limit(top_n).all()
-        
+
         return [
             {
-                'day': self._day_name(record.day_of_week),
-                'hour': record.hour_of_day,
-                'time_slot': record.time_slot,
-                'probability': record.arrival_probability_score,
-                'avg_bookings_per_30min': record.avg_bookings_per_30min
+                'day': self._day_name(day),
+                'hour': hour,
+                'time_slot': time_slot,
+                'probability': score,
+                'avg_bookings_per_30min': avg_bookings
             }
-            for record in peak_hours
+            for day, hour, time_slot, score, avg_bookings in peak_hours
         ]
     
     def predict_next_arrival_time(
@@ -290,21 +384,16 @@ class HistoricalLearner:
         }
         """
         
-        probability = self.get_arrival_probability(route_id, current_time)
-        
         day = current_time.weekday() + 1
         hour = current_time.hour
-        
-        historical_data = self.db.query(HistoricalArrivalData).filter(
-            and_(
-                HistoricalArrivalData.route_id == route_id,
-                HistoricalArrivalData.day_of_week == day,
-                HistoricalArrivalData.hour_of_day == hour
-            )
-        ).first()
-        
+
+        # One fetch serves both the probability and the arrival estimate
+        historical_data = self._fetch_historical(route_id, day, hour)
+
         if not historical_data:
             return None
+
+        probability = float(historical_data.arrival_probability_score)
         
         # Estimate arrival time based on average booking rate
         if historical_data.avg_bookings_per_30min > 0:
@@ -321,11 +410,25 @@ class HistoricalLearner:
         
         return None
     
+    def _fetch_historical(
+        self,
+        route_id: int,
+        day_of_week: int,
+        hour_of_day: int
+    ) -> Optional[HistoricalArrivalData]:
+        """Fetch the historical record for one (route, day, hour) bucket"""
+        return self.db.query(HistoricalArrivalData).filter(
+            and_(
+                HistoricalArrivalData.route_id == route_id,
+                HistoricalArrivalData.time_bucket ==
+                HistoricalArrivalData.pack_time_bucket(day_of_week, hour_of_day)
+            )
+        ).first()
+
     @staticmethod
     def _day_name(day_num: int) -> str:
         """Convert day number to name"""
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        return days[day_num - 1] if 1 <= day_num <= 7 else 'Unknown'
+        return _DAYS[day_num - 1] if 1 <= day_num <= 7 else 'Unknown'
 
 
 class HistoricalDataBuilder:
@@ -344,29 +447,35 @@ class HistoricalDataBuilder:
         """
         
         from app.models.driver import Route
-        
-        active_routes = self.db.query(Route).filter(Route.is_active == True).all()
-        
-        logger.info(f"Rebuilding historical data for {len(active_routes)} routes")
-        
+
+        route_ids = [
+            route_id for (route_id,) in
+            self.db.query(Route.id).filter(Route.is_active == True).all()
+        ]
+
+        logger.info(f"Rebuilding historical data for {len(route_ids)} routes")
+
         total_stats = {
             'routes_processed': 0,
             'total_records_created': 0,
             'total_records_updated': 0,
             'total_bookings_processed': 0
         }
-        
-        for route in active_routes:
-            try:
-                stats = self.learner.build_historical_data(route.id, lookback_days)
-                
-                total_stats['routes_processed'] += 1
-                total_stats['total_records_created'] += stats['records_created']
-                total_stats['total_records_updated'] += stats['records_updated']
-                total_stats['total_bookings_processed'] += stats['total_bookings_processed']
-                
-            except Exception as e:
-                logger.error(f"Error processing route {route.id}: {e}")
-        
+
+        try:
+            # One cross-route aggregate query instead of one per route
+            stats_by_route = self.learner.build_historical_data_all_routes(
+                route_ids, lookback_days
+            )
+        except Exception as e:
+            logger.error(f"Error rebuilding historical data: {e}")
+            return total_stats
+
+        for stats in stats_by_route.values():
+            total_stats['routes_processed'] += 1
+            total_stats['total_records_created'] += stats['records_created']
+            total_stats['total_records_updated'] += stats['records_updated']
+            total_stats['total_bookings_processed'] += stats['total_bookings_processed']
+
         logger.info(f"Historical data rebuild complete: {total_stats}")
         return total_stats
\ No newline at end of file
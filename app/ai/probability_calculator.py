@@ -6,12 +6,123 @@ This is a WEIGHTED ALGORITHM simulating ML (for MVP).
 In production, this could be replaced with a trained scikit-learn model.
 """
 
+import math
+
 import numpy as np
 from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Score lookup tables - searchsorted on a tiny thresholds array replaces
+# the if/elif ladders with a branchless indexed load
+_WAIT_THRESHOLDS_MIN = np.array([1.0, 3.0, 5.0, 10.0])
+_WAIT_SCORES = np.array([80.0, 60.0, 40.0, 20.0, 5.0])
+_FILL_THRESHOLDS = np.array([0.25, 0.5, 0.75])
+_FILL_SCORES = np.array([10.0, 30.0, 60.0, 90.0])
+
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+
+def _score_kernel(
+    historical_prob: float,
+    pending_count: int,
+    nearest_distance: int,
+    wait_time: int,
+    current_size: int,
+    max_size: int
+) -> float:
+    """
+    Scalar scoring kernel - the arithmetic from the component methods
+    inlined into one top-level function so numba can JIT-compile it.
+    Must stay in sync with the _calculate_* methods below.
+    """
+
+    # Historical component (clamped to 0-100)
+    historical_score = min(max(historical_prob, 0.0), 100.0)
+
+    # Proximity component
+    if pending_count == 0:
+        proximity_score = 0.0
+    else:
+        count_score = min(pending_count * 20, 50)
+        if nearest_distance < 200:
+            distance_score = 50
+        elif nearest_distance < 500:
+            distance_score = 30
+        elif nearest_distance < 1000:
+            distance_score = 10
+        else:
+            distance_score = 0
+        proximity_score = float(count_score + distance_score)
+
+    # Wait time component
+    wait_minutes = wait_time / 60
+    if wait_minutes < 1:
+        wait_time_score = 80.0
+    elif wait_minutes < 3:
+        wait_time_score = 60.0
+    elif wait_minutes < 5:
+        wait_time_score = 40.0
+    elif wait_minutes < 10:
+        wait_time_score = 20.0
+    else:
+        wait_time_score = 5.0
+
+    # Group size component
+    fill_ratio = current_size / max_size
+    if fill_ratio >= 0.75:
+        group_size_score = 90.0
+    elif fill_ratio >= 0.5:
+        group_size_score = 60.0
+    elif fill_ratio >= 0.25:
+        group_size_score = 30.0
+    else:
+        group_size_score = 10.0
+
+    # Weighted combination (weights mirror ProbabilityCalculator.WEIGHTS)
+    final_probability = (
+        historical_score * 0.40 +
+        proximity_score * 0.35 +
+        wait_time_score * 0.15 +
+        group_size_score * 0.10
+    )
+
+    # Clamp to 0-100 range
+    return min(max(final_probability, 0.0), 100.0)
+
+
+if _NUMBA_AVAILABLE:
+    _score_kernel = njit(cache=True)(_score_kernel)
+
+    from numba import prange
+
+    @njit(parallel=True, cache=True)
+    def _score_many_kernel(hist, pending, dist, wait, cur, mx, out):
+        """Score all groups in parallel - each slot is independent"""
+        for i in prange(out.shape[0]):
+            out[i] = _score_kernel(
+                hist[i], pending[i], dist[i], wait[i], cur[i], mx[i]
+            )
+
+    # Pre-warm the JIT compiles so the first scheduler tick isn't slow
+    _score_kernel(50.0, 0, 9999, 0, 1, 4)
+    _score_many_kernel(
+        np.array([50.0]), np.array([0]), np.array([9999]),
+        np.array([0]), np.array([1]), np.array([4]), np.empty(1)
+    )
+else:
+    def _score_many_kernel(hist, pending, dist, wait, cur, mx, out):
+        """Pure-Python fallback when numba is unavailable"""
+        for i in range(out.shape[0]):
+            out[i] = _score_kernel(
+                hist[i], pending[i], dist[i], wait[i], cur[i], mx[i]
+            )
+
 
 class ProbabilityCalculator:
     """
@@ -51,39 +162,58 @@ class ProbabilityCalculator:
             Final probability score (0-100)
         """
         
-        # Calculate individual components
-        historical_score = self._normalize_historical(historical_prob)
-        proximity_score = self._calculate_proximity_score(pending_count, nearest_distance)
-        wait_time_score = self._calculate_wait_time_score(wait_time)
-        group_size_score = self._calculate_group_size_score(current_size, max_size)
-        
-        # Weighted combination
-        final_probability = (
-            historical_score * self.WEIGHTS['historical'] +
-            proximity_score * self.WEIGHTS['proximity'] +
-            wait_time_score * self.WEIGHTS['wait_time'] +
-            group_size_score * self.WEIGHTS['group_size']
-        )
-        
-        # Clamp to 0-100 range
-        final_probability = np.clip(final_probability, 0, 100)
-        
-        logger.debug(
-            f"Probability Calculation:\n"
-            f"  Historical: {historical_score:.1f} (weight: {self.WEIGHTS['historical']})\n"
-            f"  Proximity: {proximity_score:.1f} (weight: {self.WEIGHTS['proximity']})\n"
-            f"  Wait Time: {wait_time_score:.1f} (weight: {self.WEIGHTS['wait_time']})\n"
-            f"  Group Size: {group_size_score:.1f} (weight: {self.WEIGHTS['group_size']})\n"
-            f"  FINAL: {final_probability:.1f}%"
+        # All arithmetic lives in the (optionally JIT-compiled) kernel
+        final_probability = _score_kernel(
+            float(historical_prob),
+            pending_count,
+            nearest_distance,
+            wait_time,
+            current_size,
+            max_size
         )
-        
+
+        # %-style args defer formatting until a handler actually wants it
+        logger.debug("Probability Calculation: FINAL: %.1f%%", final_probability)
+
         return round(final_probability, 2)
-    
+
+    def score_many(
+        self,
+        historical_probs,
+        pending_counts,
+        nearest_distances,
+        wait_times,
+        current_sizes,
+        max_sizes
+    ) -> np.ndarray:
+        """
+        Batch variant of calculate_final_probability
+
+        Takes six equal-length sequences (one entry per group) and
+        returns an array of final probability scores. Runs multi-core
+        via numba.prange when numba is available.
+        """
+        hist = np.asarray(historical_probs, dtype=np.float64)
+        out = np.empty(hist.shape[0], dtype=np.float64)
+
+        _score_many_kernel(
+            hist,
+            np.asarray(pending_counts, dtype=np.int64),
+            np.asarray(nearest_distances, dtype=np.int64),
+            np.asarray(wait_times, dtype=np.int64),
+            np.asarray(current_sizes, dtype=np.int64),
+            np.asarray(max_sizes, dtype=np.int64),
+            out
+        )
+
+        return np.round(out, 2)
+
     def _normalize_historical(self, historical_prob: float) -> float:
         """
         Normalize historical probability to 0-100 scale
         """
-        return np.clip(historical_prob, 0, 100)
+        # Stdlib min/max - np.clip on a scalar pays ufunc dispatch cost
+        return max(0.0, min(100.0, historical_prob))
     
     def _calculate_proximity_score(self, pending_count: int, nearest_distance: int) -> float:
         """
@@ -116,8 +246,8 @@ class ProbabilityCalculator:
         total_score = count_score + distance_score
         
         logger.debug(
-            f"Proximity Score: count={pending_count} ({count_score}pts), "
-            f"distance={nearest_distance}m ({distance_score}pts) → {total_score}/100"
+            "Proximity Score: count=%s (%spts), distance=%sm (%spts) → %s/100",
+            pending_count, count_score, nearest_distance, distance_score, total_score
         )
         
         return total_score
@@ -133,22 +263,9 @@ class ProbabilityCalculator:
         Returns: 0-100 score
         """
         wait_minutes = wait_time_seconds / 60
-        
-        if wait_minutes < 1:
-            # Very fresh group - assume high demand
-            return 80.0
-        elif wait_minutes < 3:
-            # Normal wait - still good
-            return 60.0
-        elif wait_minutes < 5:
-            # Getting long - moderate
-            return 40.0
-        elif wait_minutes < 10:
-            # Too long - low probability
-            return 20.0
-        else:
-            # Extremely long - almost zero
-            return 5.0
+
+        # LUT: <1min=80, <3=60, <5=40, <10=20, else 5
+        return float(_WAIT_SCORES[np.searchsorted(_WAIT_THRESHOLDS_MIN, wait_minutes, side='right')])
     
     def _calculate_group_size_score(self, current_size: int, max_size: int) -> float:
         """
@@ -161,15 +278,9 @@ class ProbabilityCalculator:
         Returns: 0-100 score
         """
         fill_ratio = current_size / max_size
-        
-        if fill_ratio >= 0.75:  # 3/4 or more
-            return 90.0
-        elif fill_ratio >= 0.5:  # 2/4
-            return 60.0
-        elif fill_ratio >= 0.25:  # 1/4
-            return 30.0
-        else:
-            return 10.0
+
+        # LUT: <1/4=10, <2/4=30, <3/4=60, else 90
+        return float(_FILL_SCORES[np.searchsorted(_FILL_THRESHOLDS, fill_ratio, side='right')])
     
     def calculate_confidence_interval(
         self,
@@ -185,7 +296,7 @@ class ProbabilityCalculator:
         # Simple confidence interval calculation
         # In production, use proper statistical methods
         
-        std_error = np.sqrt((probability * (100 - probability)) / sample_size)
+        std_error = math.sqrt((probability * (100 - probability)) / sample_size)
         margin = 1.96 * std_error  # 95% confidence
         
         lower = max(0, probability - margin)
@@ -263,8 +374,8 @@ class AdvancedProbabilityCalculator(ProbabilityCalculator):
         
         # Apply temporal adjustments
         adjusted = base_probability * time_of_day_factor * day_of_week_factor
-        
-        return np.clip(adjusted, 0, 100)
+
+        return max(0.0, min(100.0, adjusted))
     
     def prepare_features_for_ml(
         self,
@@ -279,41 +390,73 @@ class AdvancedProbabilityCalculator(ProbabilityCalculator):
         """
         Prepare feature vector for ML model training
         Returns: numpy array ready for scikit-learn
-        
+
+        Thin wrapper around prepare_features_batch for a single record
+        """
+        return self.prepare_features_batch([{
+            'historical_prob': historical_prob,
+            'pending_count': pending_count,
+            'nearest_distance': nearest_distance,
+            'wait_time': wait_time,
+            'current_size': current_size,
+            'hour': hour,
+            'day_of_week': day_of_week
+        }])[0]
+
+    def prepare_features_batch(self, records: list) -> np.ndarray:
+        """
+        Build a feature matrix for a batch of records in one pass
+        Returns: (N, 9) float32 matrix ready for scikit-learn
+
+        Each record is a dict with the same keys as the
+        prepare_features_for_ml arguments. Columns are filled with
+        vectorized NumPy ops into preallocated contiguous memory.
+
         Features:
-        [0] historical_prob
+        [0] historical_prob (normalized)
         [1] pending_count
         [2] nearest_distance (normalized)
         [3] wait_time (normalized)
         [4] current_size
-        [5] hour (0-23)
-        [6] day_of_week (0-6)
+        [5] hour (normalized)
+        [6] day_of_week (normalized)
         [7] is_rush_hour (boolean)
         [8] is_weekend (boolean)
         """
-        
-        # Normalize distance (0-2000m → 0-1)
-        norm_distance = min(nearest_distance / 2000, 1.0)
-        
-        # Normalize wait time (0-600s → 0-1)
-        norm_wait = min(wait_time / 600, 1.0)
-        
+
+        n = len(records)
+        X = np.empty((n, 9), dtype=np.float32)
+
+        hours = np.fromiter(
+            (r['hour'] for r in records), dtype=np.float32, count=n
+        )
+        days = np.fromiter(
+            (r['day_of_week'] for r in records), dtype=np.float32, count=n
+        )
+
+        # Normalize to 0-1 where applicable
+        X[:, 0] = np.fromiter(
+            (r['historical_prob'] for r in records), dtype=np.float32, count=n
+        ) / 100
+        X[:, 1] = np.fromiter(
+            (r['pending_count'] for r in records), dtype=np.float32, count=n
+        )
+        # Distance (0-2000m → 0-1)
+        X[:, 2] = np.minimum(np.fromiter(
+            (r['nearest_distance'] for r in records), dtype=np.float32, count=n
+        ) / 2000, 1.0)
+        # Wait time (0-600s → 0-1)
+        X[:, 3] = np.minimum(np.fromiter(
+            (r['wait_time'] for r in records), dtype=np.float32, count=n
+        ) / 600, 1.0)
+        X[:, 4] = np.fromiter(
+            (r['current_size'] for r in records), dtype=np.float32, count=n
+        )
+        X[:, 5] = hours / 24
+        X[:, 6] = days / 7
         # Rush hour detection (7-9 AM, 5-7 PM)
-        is_rush_hour = 1 if (7 <= hour <= 9) or (17 <= hour <= 19) else 0
-        
+        X[:, 7] = ((hours >= 7) & (hours <= 9)) | ((hours >= 17) & (hours <= 19))
         # Weekend detection
-        is_weekend = 1 if day_of_week >= 5 else 0
-        
-        features = np.array([
-            historical_prob / 100,  # Normalize to 0-1
-            pending_count,
-            norm_distance,
-            norm_wait,
-            current_size,
-            hour / 24,  # Normalize to 0-1
-            day_of_week / 7,  # Normalize to 0-1
-            is_rush_hour,
-            is_weekend
-        ])
-        
-        return features
\ No newline at end of file
+        X[:, 8] = days >= 5
+
+        return X
\ No newline at end of file
@@ -5,11 +5,12 @@ Analyzes pending bookings for strategic dispatch
 
 from typing import Dict, List
 from datetime import datetime, timedelta
+import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func
 
-from app.models.ride_group import BookingRequest, RideGroup
-from app.utils.geo import calculate_distance
+from app.models.ride_group import BookingRequest, RequestStatus, RideGroup
+from app.utils.geo import calculate_distances_batch
 
 import logging
 
@@ -48,14 +49,32 @@ class ProximityAnalyzer:
             seconds=self.RECENT_BOOKING_WINDOW_SECONDS
         )
         
+        pending_filter = and_(
+            BookingRequest.route_id == route_id,
+            BookingRequest.request_status == RequestStatus.SEARCHING,
+            BookingRequest.requested_at >= recent_threshold
+        )
+
         try:
-            pending_bookings = self.db.query(BookingRequest).filter(
-                and_(
-                    BookingRequest.route_id == route_id,
-                    BookingRequest.request_status == "SEARCHING",
-                    BookingRequest.requested_at >= recent_threshold
-                )
-            ).all()
+            # Cheap indexed COUNT first - most ticks find nothing pending
+            # and never pay for row fetches
+            pending_count = self.db.query(
+                func.count(BookingRequest.id)
+            ).filter(pending_filter).scalar() or 0
+
+            if pending_count == 0:
+                return {
+                    'pending_count': 0,
+                    'nearest_distance_meters': 9999,
+                    'strategic_advantage': False,
+                    'reasoning': 'No pending bookings detected'
+                }
+
+            # Only now fetch the two columns the distance scan needs
+            pending_coords = self.db.query(
+                BookingRequest.request_lat,
+                BookingRequest.request_lng
+            ).filter(pending_filter).all()
         except Exception as e:
             logger.error(f"Error querying pending bookings: {e}")
             return {
@@ -64,32 +83,24 @@ class ProximityAnalyzer:
                 'strategic_advantage': False,
                 'reasoning': 'Error checking bookings'
             }
-        
-        if not pending_bookings:
-            return {
-                'pending_count': 0,
-                'nearest_distance_meters': 9999,
-                'strategic_advantage': False,
-                'reasoning': 'No pending bookings detected'
-            }
-        
+
         # Calculate nearest distance
-        nearest_distance = self._calculate_nearest_distance(group, pending_bookings)
-        
+        nearest_distance = self._calculate_nearest_distance(group, pending_coords)
+
         # Determine strategic advantage
         strategic_advantage = (
-            len(pending_bookings) >= 2 and
+            pending_count >= 2 and
             nearest_distance < self.MAX_PROXIMITY_METERS
         )
-        
+
         reasoning = self._build_reasoning(
-            len(pending_bookings),
+            pending_count,
             nearest_distance,
             strategic_advantage
         )
-        
+
         return {
-            'pending_count': len(pending_bookings),
+            'pending_count': pending_count,
             'nearest_distance_meters': nearest_distance,
             'strategic_advantage': strategic_advantage,
             'reasoning': reasoning
@@ -98,26 +109,31 @@ class ProximityAnalyzer:
     def _calculate_nearest_distance(
         self,
         group: RideGroup,
-        bookings: List[BookingRequest]
+        coords: List[tuple]
     ) -> int:
         """Calculate distance to nearest pending booking"""
-        
+
         group_lat = float(group.route.origin_lat)
         group_lng = float(group.route.origin_lng)
-        
-        distances = []
-        for booking in bookings:
-            try:
-                distance = calculate_distance(
-                    group_lat, group_lng,
-                    float(booking.request_lat), float(booking.request_lng)
-                )
-                distances.append(distance)
-            except Exception as e:
-                logger.error(f"Error calculating distance: {e}")
-                continue
-        
-        return min(distances) if distances else 9999
+
+        try:
+            # Vectorized (numba-JITed when available) haversine over all
+            # bookings at once instead of per-booking scalar trig
+            lats = np.fromiter(
+                (float(lat) for lat, _ in coords),
+                dtype=np.float64, count=len(coords)
+            )
+            lngs = np.fromiter(
+                (float(lng) for _, lng in coords),
+                dtype=np.float64, count=len(coords)
+            )
+
+            distances = calculate_distances_batch(group_lat, group_lng, lats, lngs)
+        except Exception as e:
+            logger.error(f"Error calculating distance: {e}")
+            return 9999
+
+        return int(distances.min()) if distances.size else 9999
     
     def _build_reasoning(
         self,
@@ -3,35 +3,112 @@ Background Scheduler for Smart Dispatch AI
 Runs every 30 seconds to analyze forming groups
 """
 
-from apscheduler.schedulers.background import BackgroundScheduler
+import asyncio
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 import logging
 
-from app.database.session import get_db
+from app.database.session import SessionLocal
 from app.ai.smart_dispatch import SmartDispatchService
 
 logger = logging.getLogger(__name__)
 
 scheduler = None
 
+# Arbitrary but stable key identifying the dispatch scheduler's
+# advisory lock across the whole deployment
+_SCHEDULER_LOCK_KEY = 815_372_001
+
+# Connection holding the session-level advisory lock; kept open for
+# the process lifetime so the lock persists
+_scheduler_lock_conn = None
+
+
+def _acquire_scheduler_leadership() -> bool:
+    """
+    Ensure only one process per deployment runs the background jobs
 
-def run_dispatch_analysis_job():
+    With multiple uvicorn workers every process runs the lifespan, so
+    without this guard each worker would dispatch the same groups and
+    refresh the same view every 30s. A Postgres session-level advisory
+    lock elects one leader; non-Postgres engines (single-process dev
+    setups) always win.
+    """
+    global _scheduler_lock_conn
+    from sqlalchemy import text
+    from app.database.session import engine
+
+    if engine.dialect.name != 'postgresql':
+        return True
+
+    conn = None
+    try:
+        conn = engine.connect()
+        acquired = conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"),
+            {"key": _SCHEDULER_LOCK_KEY}
+        ).scalar()
+    except Exception as e:
+        if conn is not None:
+            conn.close()
+        # Degrade like the rest of startup: an unreachable database
+        # must not abort boot. Default single-worker deployments still
+        # get exactly one scheduler; the lock re-arms on restart.
+        logger.error(f"❌ Could not acquire scheduler lock, starting unguarded: {e}")
+        return True
+
+    if acquired:
+        _scheduler_lock_conn = conn
+        return True
+
+    conn.close()
+    return False
+
+
+def _release_scheduler_leadership():
+    global _scheduler_lock_conn
+
+    if _scheduler_lock_conn is not None:
+        # Closing the connection releases the session-level lock
+        _scheduler_lock_conn.close()
+        _scheduler_lock_conn = None
+
+
+def _run_dispatch_analysis_sync():
+    """Blocking part of the dispatch tick (sync SQLAlchemy session)"""
+    # Session context manager guarantees the connection is returned
+    # to the pool even if the analysis raises
+    with SessionLocal() as db:
+        dispatch_service = SmartDispatchService(db)
+
+        return dispatch_service.run_dispatch_analysis()
+
+
+async def run_dispatch_analysis_job():
     """
     Job that runs every 30 seconds
     Analyzes all forming groups and makes dispatch decisions
     """
     try:
-        db = next(get_db())
-        dispatch_service = SmartDispatchService(db)
-        
-        stats = dispatch_service.run_dispatch_analysis()
-        
+        # DB work is still sync (psycopg2), so push it to a worker
+        # thread instead of blocking the event loop
+        stats = await asyncio.to_thread(_run_dispatch_analysis_sync)
+
         logger.info(f"✅ Dispatch analysis completed: {stats}")
-        
+
     except Exception as e:
         logger.error(f"❌ Error in dispatch analysis job: {e}", exc_info=True)
-    finally:
-        db.close()
+
+
+async def refresh_route_stats_job():
+    """Refresh the route_hot_stats materialized view (Postgres only)"""
+    from app.database.session import refresh_route_hot_stats
+
+    try:
+        await asyncio.to_thread(refresh_route_hot_stats)
+    except Exception as e:
+        logger.error(f"❌ Error refreshing route stats: {e}")
 
 
 def start_smart_dispatch_scheduler():
@@ -43,8 +120,13 @@ def start_smart_dispatch_scheduler():
     if scheduler is not None:
         logger.warning("Scheduler already running")
         return
-    
-    scheduler = BackgroundScheduler()
+
+    if not _acquire_scheduler_leadership():
+        logger.info("🤖 Another worker holds the scheduler lock - not starting here")
+        return
+
+    # Runs inside the FastAPI event loop - no dedicated scheduler thread
+    scheduler = AsyncIOScheduler()
     
     # Add job: run every 30 seconds
     scheduler.add_job(
@@ -56,6 +138,16 @@ def start_smart_dispatch_scheduler():
         max_instances=1  # Ensure only one instance runs at a time
     )
     
+    # Keep the pre-aggregated route stats fresh on the same cadence
+    scheduler.add_job(
+        func=refresh_route_stats_job,
+        trigger=IntervalTrigger(seconds=30),
+        id='route_hot_stats_refresh',
+        name='Route Hot Stats Refresh',
+        replace_existing=True,
+        max_instances=1
+    )
+
     scheduler.start()
     logger.info("🤖 Smart Dispatch Scheduler started (runs every 30 seconds)")
 
@@ -69,4 +161,6 @@ def stop_smart_dispatch_scheduler():
     if scheduler is not None:
         scheduler.shutdown(wait=True)
         scheduler = None
-        logger.info("🛑 Smart Dispatch Scheduler stopped")
\ No newline at end of file
+        logger.info("🛑 Smart Dispatch Scheduler stopped")
+
+    _release_scheduler_leadership()
\ No newline at end of file
@@ -5,11 +5,12 @@ Runs every 30 seconds to analyze forming groups and make dispatch decisions
 
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_
 
-from app.models.ride_group import RideGroup, GroupStatus, DispatchDecisionType
-from app.models.booking_request import BookingRequest
+from app.models.ride_group import (
+    RideGroup, GroupStatus, DispatchDecisionType, BookingRequest, RequestStatus
+)
 from app.ai.probability_calculator import ProbabilityCalculator
 from app.ai.proximity_analyzer import ProximityAnalyzer
 from app.ai.historical_learner import HistoricalLearner
@@ -22,6 +23,60 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _make_specialized_decider(prob_low, prob_high, min_wait, max_wait):
+    """
+    Bake the decision thresholds into a closure
+
+    The rules fire per forming group every tick; binding the four
+    configuration constants as closure locals avoids re-reading them
+    off the class on every call.
+    """
+
+    def decide(final_probability: float, wait_time: int, pending_count: int,
+               nearest_distance: int) -> Dict:
+        # RULE 1: Strategic Positioning (YOUR GENIUS ENHANCEMENT)
+        if pending_count >= 2 and nearest_distance < 500 and wait_time > min_wait:
+            return {
+                "action": "DISPATCH_NOW",
+                "reasoning": (
+                    f"STRATEGIC: {pending_count} users waiting within "
+                    f"{nearest_distance}m - dispatch to secure them!"
+                )
+            }
+
+        # RULE 2: Low Probability + Significant Wait
+        if final_probability < prob_low and wait_time > min_wait:
+            return {
+                "action": "DISPATCH_NOW",
+                "reasoning": (
+                    f"Low arrival probability ({final_probability:.1f}%) + "
+                    f"wait time {wait_time}s"
+                )
+            }
+
+        # RULE 3: High Probability = Wait
+        if final_probability > prob_high:
+            return {
+                "action": "WAIT",
+                "reasoning": f"High arrival probability ({final_probability:.1f}%)"
+            }
+
+        # RULE 4: Maximum Wait Exceeded (Safety)
+        if wait_time > max_wait:
+            return {
+                "action": "DISPATCH_NOW",
+                "reasoning": f"Maximum wait time exceeded ({wait_time}s)"
+            }
+
+        # Default: WAIT (uncertain state)
+        return {
+            "action": "WAIT",
+            "reasoning": f"Uncertain probability ({final_probability:.1f}%), continuing to wait"
+        }
+
+    return decide
+
+
 class SmartDispatchService:
     """
     The AI brain that decides:
@@ -42,6 +97,14 @@ class SmartDispatchService:
         self.proximity_analyzer = ProximityAnalyzer(db)
         self.historical_learner = HistoricalLearner(db)
         self.notification_service = get_notification_service()
+        self._pending_logs = []
+        # Decision rules specialized once with the configured thresholds
+        self._decide = _make_specialized_decider(
+            self.PROBABILITY_THRESHOLD_LOW,
+            self.PROBABILITY_THRESHOLD_HIGH,
+            self.MIN_WAIT_TIME_SECONDS,
+            self.MAX_WAIT_TIME_SECONDS
+        )
     
     def run_dispatch_analysis(self) -> Dict[str, int]:
         """
@@ -50,91 +113,183 @@ class SmartDispatchService:
         """
         logger.info("🤖 AI Dispatch Analysis Started")
         
-        # Find all groups currently forming
-        forming_groups = self.db.query(RideGroup).filter(
-            RideGroup.group_status == GroupStatus.FORMING
+        # Fast path: full groups need no AI - dispatch them straight away
+        # (RULE 0, partitioned into SQL so the analysis pipeline below
+        # only ever sees partial groups)
+        full_groups = self.db.query(RideGroup).filter(
+            RideGroup.group_status == GroupStatus.FORMING,
+            RideGroup.current_size >= RideGroup.max_size
         ).all()
-        
+
+        # Partial groups currently forming; eager-load the route so the
+        # proximity analysis doesn't lazy-load it per group. yield_per
+        # streams rows in batches so memory stays bounded however large
+        # the FORMING backlog grows.
+        forming_groups = self.db.query(RideGroup).options(
+            joinedload(RideGroup.route)
+        ).filter(
+            RideGroup.group_status == GroupStatus.FORMING,
+            RideGroup.current_size < RideGroup.max_size
+        ).yield_per(200)
+
         stats = {
-            "analyzed": len(forming_groups),
+            "analyzed": len(full_groups),
             "dispatched": 0,
             "waiting": 0,
             "skipped": 0
         }
-        
+
+        # Decision logs accumulate here and flush in one INSERT at the end
+        self._pending_logs = []
+
+        for group in full_groups:
+            try:
+                self._dispatch_group(group, DispatchDecisionType.FULL_GROUP, 100.0)
+                stats["dispatched"] += 1
+            except Exception as e:
+                logger.error(f"Error dispatching full group {group.id}: {str(e)}")
+                stats["skipped"] += 1
+
+        # ===== GATHER PHASE: collect features for every eligible group =====
+        candidates = []  # (group, wait_time, historical_prob, proximity_analysis)
+
+        # Groups on the same route share the same origin, so one
+        # proximity query per distinct route covers the whole tick
+        proximity_by_route = {}
+
+        # One clock read serves every group in this tick
+        tick_now = datetime.utcnow()
+
         for group in forming_groups:
+            stats["analyzed"] += 1
             try:
-                decision = self._analyze_and_decide(group)
-                stats[decision] += 1
+                features = self._gather_group_features(group, proximity_by_route, tick_now)
+                if features is None:
+                    stats["skipped"] += 1
+                elif features == "dispatched":
+                    stats["dispatched"] += 1
+                else:
+                    candidates.append(features)
             except Exception as e:
                 logger.error(f"Error analyzing group {group.id}: {str(e)}")
                 stats["skipped"] += 1
-        
+
+        # ===== SCORE PHASE: batch-score all candidates in one call =====
+        if candidates:
+            probabilities = self.probability_calculator.score_many(
+                historical_probs=[c[2] for c in candidates],
+                pending_counts=[c[3]['pending_count'] for c in candidates],
+                nearest_distances=[c[3]['nearest_distance_meters'] for c in candidates],
+                wait_times=[c[1] for c in candidates],
+                current_sizes=[c[0].current_size for c in candidates],
+                max_sizes=[c[0].max_size for c in candidates]
+            )
+
+            # ===== DECIDE PHASE: act on each group with its score =====
+            for (group, wait_time, _, proximity_analysis), final_probability in zip(
+                candidates, probabilities
+            ):
+                try:
+                    outcome = self._decide_and_execute(
+                        group, float(final_probability), wait_time, proximity_analysis
+                    )
+                    stats[outcome] += 1
+                except Exception as e:
+                    logger.error(f"Error analyzing group {group.id}: {str(e)}")
+                    stats["skipped"] += 1
+
+        self._flush_decision_logs()
+
         logger.info(f"✅ Analysis complete: {stats}")
         return stats
-    
-    def _analyze_and_decide(self, group: RideGroup) -> str:
+
+    def _flush_decision_logs(self):
+        """Write all decision logs for this cycle in one INSERT + commit"""
+        from app.models.ride_group import DispatchDecisionLog
+
+        if not self._pending_logs:
+            return
+
+        self.db.bulk_insert_mappings(DispatchDecisionLog, self._pending_logs)
+        self.db.commit()
+        self._pending_logs = []
+
+    def _gather_group_features(self, group: RideGroup, proximity_by_route: Dict,
+                               tick_now: datetime):
         """
-        Core AI decision logic for a single group
-        Returns: "dispatched", "waiting", or "skipped"
+        Collect scoring inputs for a single group
+
+        Returns:
+            None if the group should be skipped,
+            "dispatched" if it was full and dispatched immediately,
+            else (group, wait_time, historical_prob, proximity_analysis)
         """
-        
+
         # RULE 0: If full, dispatch immediately
         if group.is_full():
             self._dispatch_group(group, DispatchDecisionType.FULL_GROUP, 100.0)
             return "dispatched"
-        
+
         # Get wait time
-        wait_time_seconds = group.get_wait_time_seconds()
-        
+        wait_time_seconds = group.get_wait_time_seconds(tick_now)
+
         # Skip if too young (let it form)
         if wait_time_seconds < 60:
-            logger.debug(f"Group {group.id} too young ({wait_time_seconds}s), skipping")
-            return "skipped"
-        
+            logger.debug("Group %s too young (%ss), skipping", group.id, wait_time_seconds)
+            return None
+
         logger.info(
             f"🔍 Analyzing Group {group.id} | "
             f"Size: {group.current_size}/{group.max_size} | "
             f"Wait: {wait_time_seconds}s"
         )
-        
+
         # ===== STEP 1: Get Historical Probability =====
         historical_prob = self.historical_learner.get_arrival_probability(
             route_id=group.route_id,
-            current_time=datetime.utcnow()
+            current_time=tick_now
         )
-        
+
         # ===== STEP 2: Analyze Pending Bookings (YOUR ENHANCEMENT) =====
-        proximity_analysis = self.proximity_analyzer.analyze_pending_bookings(
-            route_id=group.route_id,
-            group=group
-        )
-        
-        # ===== STEP 3: Calculate Final Probability =====
-        final_probability = self.probability_calculator.calculate_final_probability(
-            historical_prob=historical_prob,
-            pending_count=proximity_analysis['pending_count'],
-            nearest_distance=proximity_analysis['nearest_distance_meters'],
-            wait_time=wait_time_seconds,
-            current_size=group.current_size
-        )
-        
+        proximity_analysis = proximity_by_route.get(group.route_id)
+        if proximity_analysis is None:
+            proximity_analysis = self.proximity_analyzer.analyze_pending_bookings(
+                route_id=group.route_id,
+                group=group
+            )
+            proximity_by_route[group.route_id] = proximity_analysis
+
+        return (group, wait_time_seconds, historical_prob, proximity_analysis)
+
+    def _decide_and_execute(
+        self,
+        group: RideGroup,
+        final_probability: float,
+        wait_time: int,
+        proximity_analysis: Dict
+    ) -> str:
+        """
+        Decision pipeline for a single scored group
+        Returns: "dispatched" or "waiting"
+        """
+
         # ===== STEP 4: Make Decision =====
         decision = self._make_decision(
             group=group,
             final_probability=final_probability,
-            wait_time=wait_time_seconds,
+            wait_time=wait_time,
             proximity_analysis=proximity_analysis
         )
-        
+
         # ===== STEP 5: Log Decision =====
         self._log_decision(
             group=group,
             decision=decision,
             probability=final_probability,
+            wait_time=wait_time,
             proximity_analysis=proximity_analysis
         )
-        
+
         # ===== STEP 6: Execute Decision =====
         return self._execute_decision(group, decision, final_probability)
     
@@ -146,54 +301,15 @@ class SmartDispatchService:
         proximity_analysis: Dict
     ) -> Dict:
         """
-        Decision logic with multiple rules
+        Decision logic with multiple rules (see _make_specialized_decider)
         Returns: {action: str, reasoning: str}
         """
-        
-        # RULE 1: Strategic Positioning (YOUR GENIUS ENHANCEMENT)
-        if (proximity_analysis['pending_count'] >= 2 and
-            proximity_analysis['nearest_distance_meters'] < 500 and
-            wait_time > self.MIN_WAIT_TIME_SECONDS):
-            
-            return {
-                "action": "DISPATCH_NOW",
-                "reasoning": (
-                    f"STRATEGIC: {proximity_analysis['pending_count']} users waiting within "
-                    f"{proximity_analysis['nearest_distance_meters']}m - dispatch to secure them!"
-                )
-            }
-        
-        # RULE 2: Low Probability + Significant Wait
-        if (final_probability < self.PROBABILITY_THRESHOLD_LOW and
-            wait_time > self.MIN_WAIT_TIME_SECONDS):
-            
-            return {
-                "action": "DISPATCH_NOW",
-                "reasoning": (
-                    f"Low arrival probability ({final_probability:.1f}%) + "
-                    f"wait time {wait_time}s"
-                )
-            }
-        
-        # RULE 3: High Probability = Wait
-        if final_probability > self.PROBABILITY_THRESHOLD_HIGH:
-            return {
-                "action": "WAIT",
-                "reasoning": f"High arrival probability ({final_probability:.1f}%)"
-            }
-        
-        # RULE 4: Maximum Wait Exceeded (Safety)
-        if wait_time > self.MAX_WAIT_TIME_SECONDS:
-            return {
-                "action": "DISPATCH_NOW",
-                "reasoning": f"Maximum wait time exceeded ({wait_time}s)"
-            }
-        
-        # Default: WAIT (uncertain state)
-        return {
-            "action": "WAIT",
-            "reasoning": f"Uncertain probability ({final_probability:.1f}%), continuing to wait"
-        }
+        return self._decide(
+            final_probability,
+            wait_time,
+            proximity_analysis['pending_count'],
+            proximity_analysis['nearest_distance_meters']
+        )
     
     def _execute_decision(
         self,
@@ -207,8 +323,9 @@ class SmartDispatchService:
             self._dispatch_group(group, DispatchDecisionType.EARLY_DISPATCH, probability)
             return "dispatched"
         else:
-            # Notify users about waiting
-            self.notification_service.notify_group_waiting(
+            # Notify users about waiting (scheduled, not awaited - one
+            # room broadcast reaches every member)
+            self.notification_service.notify_group_waiting_sync(
                 group_id=group.id,
                 message=f"Hold tight! {decision['reasoning']}"
             )
@@ -237,16 +354,15 @@ class SmartDispatchService:
         group.dispatch_decision_type = decision_type
         group.dispatch_probability_score = probability
         group.qr_code = generate_qr_code(group.id)
-        
-        self.db.commit()
-        
-        # Update all booking requests to GROUPED
+
+        # Update all booking requests to GROUPED in the same transaction
+        # as the group mutation - one set-based UPDATE, one commit
         self.db.query(BookingRequest).filter(
             BookingRequest.group_id == group.id
         ).update({
-            "request_status": "GROUPED",
+            "request_status": RequestStatus.GROUPED,
             "grouped_at": datetime.utcnow()
-        })
+        }, synchronize_session=False)
         self.db.commit()
         
         # Notify members with group details (NO payment info)
@@ -261,22 +377,18 @@ class SmartDispatchService:
         group: RideGroup,
         decision: Dict,
         probability: float,
+        wait_time: int,
         proximity_analysis: Dict
     ):
-        """Log AI decision for analytics"""
-        from app.models.ride_group import DispatchDecisionLog
-        
-        log = DispatchDecisionLog(
-            group_id=group.id,
-            group_size_at_decision=group.current_size,
-            wait_time_seconds=group.get_wait_time_seconds(),
-            pending_bookings_count=proximity_analysis['pending_count'],
-            nearest_pending_distance_meters=proximity_analysis['nearest_distance_meters'],
-            historical_probability=proximity_analysis.get('historical_prob'),
-            final_probability_score=probability,
-            decision_made=decision['action'],
-            reasoning=decision['reasoning']
-        )
-        
-        self.db.add(log)
-        self.db.commit()
\ No newline at end of file
+        """Queue AI decision for analytics (flushed in bulk per cycle)"""
+        self._pending_logs.append({
+            'group_id': group.id,
+            'group_size_at_decision': group.current_size,
+            'wait_time_seconds': wait_time,
+            'pending_bookings_count': proximity_analysis['pending_count'],
+            'nearest_pending_distance_meters': proximity_analysis['nearest_distance_meters'],
+            'historical_probability': proximity_analysis.get('historical_prob'),
+            'final_probability_score': probability,
+            'decision_made': decision['action'],
+            'reasoning': decision['reasoning']
+        })
\ No newline at end of file
@@ -7,12 +7,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List, Dict
 from datetime import datetime, timedelta
+import time
 
 from app.database.session import get_db
 from app.services.auth_service import get_current_driver
 from app.models.driver import Driver, Route
-from app.models.ride_group import RideGroup, GroupStatus
-from app.models.booking_request import BookingRequest
+from app.models.ride_group import RideGroup, GroupStatus, RequestStatus, BookingRequest
 from app.schemas.driver_schema import (
     DriverDashboardResponse,
     RouteOpportunity,
@@ -21,9 +21,22 @@ from app.schemas.driver_schema import (
 
 router = APIRouter(prefix="/driver", tags=["Driver"])
 
+# Short-lived in-process cache for dashboard responses. Driver apps
+# poll every few seconds; keying on a ~100m location grid means a
+# stationary driver's polls (and co-located drivers' - the data is the
+# same public opportunity view) skip the whole query pipeline.
+# Maps (driver_id, lat_grid, lng_grid) -> (expires_at, response)
+_DASHBOARD_CACHE: Dict[tuple, tuple] = {}
+_DASHBOARD_CACHE_TTL_SECONDS = 2.0
+_DASHBOARD_CACHE_MAX_ENTRIES = 1000
+
+
+def _invalidate_dashboard_cache():
+    _DASHBOARD_CACHE.clear()
+
 
 @router.get("/dashboard", response_model=DriverDashboardResponse)
-async def get_driver_dashboard(
+def get_driver_dashboard(
     current_driver: Driver = Depends(get_current_driver),
     db: Session = Depends(get_db)
 ):
@@ -39,6 +52,15 @@ async def get_driver_dashboard(
             detail="Please enable location services"
         )
     
+    cache_key = (
+        current_driver.id,
+        round(current_driver.current_lat, 3),
+        round(current_driver.current_lng, 3)
+    )
+    cached = _DASHBOARD_CACHE.get(cache_key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
     # Find nearby forming groups (within 2km)
     nearby_groups = _find_nearby_opportunities(
         db=db,
@@ -60,7 +82,7 @@ async def get_driver_dashboard(
         driver=current_driver
     )
     
-    return DriverDashboardResponse(
+    response = DriverDashboardResponse(
         driver_status={
             "is_online": current_driver.is_online,
             "is_available": current_driver.is_available,
@@ -73,9 +95,19 @@ async def get_driver_dashboard(
         ai_suggestion=ai_suggestion
     )
 
+    # Moving drivers mint a new grid-cell key per poll, so keep the
+    # table bounded - entries are stale after 2s anyway
+    if len(_DASHBOARD_CACHE) >= _DASHBOARD_CACHE_MAX_ENTRIES:
+        _DASHBOARD_CACHE.clear()
+    _DASHBOARD_CACHE[cache_key] = (
+        time.monotonic() + _DASHBOARD_CACHE_TTL_SECONDS,
+        response
+    )
+    return response
+
 
 @router.get("/opportunities/routes", response_model=List[RouteOpportunity])
-async def get_route_opportunities(
+def get_route_opportunities(
     current_driver: Driver = Depends(get_current_driver),
     db: Session = Depends(get_db)
 ):
@@ -85,45 +117,53 @@ async def get_route_opportunities(
              vs Route B: 2 full-route passengers (12 mins, ₹120)"
     """
     
+    from sqlalchemy import func
+
     active_routes = db.query(Route).filter(Route.is_active == True).all()
-    
-    opportunities = []
-    
-    for route in active_routes:
-        # Count pending bookings per route
-        pending_bookings = db.query(BookingRequest).filter(
-            BookingRequest.route_id == route.id,
-            BookingRequest.request_status == "SEARCHING"
-        ).all()
-        
-        # Separate short vs full route passengers (based on user's destination)
-        short_route_count = sum(1 for b in pending_bookings if _is_short_route_booking(b, route))
-        full_route_count = len(pending_bookings) - short_route_count
-        
-        # Calculate profit potential
-        profit_analysis = route.calculate_profit_potential(
-            short_passengers=short_route_count,
-            full_passengers=full_route_count
-        )
-        
-        # Find forming groups on this route
-        forming_groups_count = db.query(RideGroup).filter(
-            RideGroup.route_id == route.id,
+
+    # Per-route counts in two grouped queries instead of two per route
+    pending_counts = dict(
+        db.query(BookingRequest.route_id, func.count()).filter(
+            BookingRequest.request_status == RequestStatus.SEARCHING
+        ).group_by(BookingRequest.route_id).all()
+    )
+    forming_counts = dict(
+        db.query(RideGroup.route_id, func.count()).filter(
             RideGroup.group_status == GroupStatus.FORMING
-        ).count()
-        
-        opportunities.append(
-            RouteOpportunity(
-                route_id=route.id,
-                route_name=f"{route.origin_name} → {route.destination_name}",
-                pending_bookings_total=len(pending_bookings),
-                short_route_passengers=short_route_count,
-                full_route_passengers=full_route_count,
-                forming_groups_count=forming_groups_count,
-                profit_analysis=profit_analysis,
-                recommendation=_generate_route_recommendation(profit_analysis)
-            )
+        ).group_by(RideGroup.route_id).all()
+    )
+
+    pending_totals = [pending_counts.get(route.id, 0) for route in active_routes]
+
+    # Separate short vs full route passengers (based on user's destination)
+    # BookingRequest has no destination column yet, so everything counts
+    # as full-route; once it lands, fold the split into the grouped
+    # query above as SUM(CASE WHEN is_short THEN 1 ELSE 0 END)
+    short_route_counts = [0] * len(active_routes)
+    full_route_counts = pending_totals
+
+    # Profit potential for all routes in one vectorized pass
+    from app.models.driver import calculate_profit_potential_batch
+    profit_analyses = calculate_profit_potential_batch(
+        active_routes, short_route_counts, full_route_counts
+    )
+
+    opportunities = [
+        RouteOpportunity(
+            route_id=route.id,
+            route_name=f"{route.origin_name} → {route.destination_name}",
+            pending_bookings_total=pending_total,
+            short_route_passengers=short_count,
+            full_route_passengers=full_count,
+            forming_groups_count=forming_counts.get(route.id, 0),
+            profit_analysis=profit_analysis,
+            recommendation=_generate_route_recommendation(profit_analysis)
+        )
+        for route, pending_total, short_count, full_count, profit_analysis in zip(
+            active_routes, pending_totals, short_route_counts,
+            full_route_counts, profit_analyses
         )
+    ]
     
     # Sort by potential revenue
     opportunities.sort(
@@ -144,8 +184,12 @@ async def accept_group_assignment(
     Driver accepts a ready group
     """
     
-    # Find the group
-    group = db.query(RideGroup).filter(
+    from sqlalchemy.orm import joinedload
+
+    # Find the group (route eager-loaded - the response reads it)
+    group = db.query(RideGroup).options(
+        joinedload(RideGroup.route)
+    ).filter(
         RideGroup.id == group_id,
         RideGroup.group_status == GroupStatus.READY
     ).first()
@@ -181,6 +225,9 @@ async def accept_group_assignment(
     db.add(ride)
     db.commit()
     db.refresh(ride)
+
+    # Opportunity set changed - drop cached dashboards
+    _invalidate_dashboard_cache()
     
     # Notify passengers (WebSocket)
     from app.websocket.manager import notify_group_driver_assigned
@@ -216,50 +263,76 @@ def _find_nearby_opportunities(
     radius_km: float
 ) -> List[Dict]:
     """Find groups ready for dispatch within radius"""
-    from app.utils.geo import calculate_distance
-    
-    ready_groups = db.query(RideGroup).filter(
+    from sqlalchemy import func
+    from sqlalchemy.orm import contains_eager
+
+    # Haversine pushed into SQL: one round-trip, filtered and sorted
+    # server-side instead of loading every READY group into Python.
+    # Float rounding can push the acos argument a hair past 1.0 when
+    # the driver stands at the route origin - clamp it to [-1, 1] or
+    # Postgres raises "input is out of range".
+    cos_angle = func.least(1.0, func.greatest(-1.0, (
+        func.cos(func.radians(driver_lat)) *
+        func.cos(func.radians(Route.origin_lat)) *
+        func.cos(func.radians(Route.origin_lng) - func.radians(driver_lng)) +
+        func.sin(func.radians(driver_lat)) *
+        func.sin(func.radians(Route.origin_lat))
+    )))
+    distance_km = (6371 * func.acos(cos_angle)).label('distance_km')
+
+    rows = db.query(RideGroup, distance_km).join(
+        Route, RideGroup.route_id == Route.id
+    ).options(
+        contains_eager(RideGroup.route)
+    ).filter(
         RideGroup.group_status == GroupStatus.READY,
-        RideGroup.assigned_driver_id == None
-    ).all()
-    
-    nearby = []
-    
-    for group in ready_groups:
-        distance_km = calculate_distance(
-            driver_lat, driver_lng,
-            group.route.origin_lat, group.route.origin_lng
-        ) / 1000  # Convert meters to km
-        
-        if distance_km <= radius_km:
-            nearby.append({
-                "group_id": group.id,
-                "passenger_count": group.current_size,
-                "route_name": f"{group.route.origin_name} → {group.route.destination_name}",
-                "distance_km": round(distance_km, 2),
-                "wait_time_mins": round(group.get_wait_time_seconds() / 60, 1),
-                "qr_code": group.qr_code
-            })
-    
-    # Sort by distance
-    nearby.sort(key=lambda x: x['distance_km'])
-    return nearby
+        RideGroup.assigned_driver_id.is_(None),
+        distance_km <= radius_km
+    ).order_by(distance_km).all()
+
+    return [
+        {
+            "group_id": group.id,
+            "passenger_count": group.current_size,
+            "route_name": f"{group.route.origin_name} → {group.route.destination_name}",
+            "distance_km": round(float(dist), 2),
+            "wait_time_mins": round(group.get_wait_time_seconds() / 60, 1),
+            "qr_code": group.qr_code
+        }
+        for group, dist in rows
+    ]
+
+
+def _route_pending_counts(db: Session) -> Dict[int, int]:
+    """Per-route pending counts, served from route_hot_stats on Postgres"""
+    from sqlalchemy import func, text
+
+    if db.get_bind().dialect.name == 'postgresql':
+        rows = db.execute(
+            text("SELECT route_id, pending_bookings FROM route_hot_stats")
+        ).all()
+        return {route_id: pending for route_id, pending in rows}
+
+    return dict(
+        db.query(BookingRequest.route_id, func.count()).filter(
+            BookingRequest.request_status == RequestStatus.SEARCHING
+        ).group_by(BookingRequest.route_id).all()
+    )
 
 
 def _analyze_route_opportunities(db: Session, driver: Driver) -> Dict:
     """Analyze which routes have better time/profit optimization"""
-    
+
     # Get all active routes
     routes = db.query(Route).filter(Route.is_active == True).all()
-    
+
+    pending_counts = _route_pending_counts(db)
+
     analysis = {}
-    
+
     for route in routes:
-        pending = db.query(BookingRequest).filter(
-            BookingRequest.route_id == route.id,
-            BookingRequest.request_status == "SEARCHING"
-        ).count()
-        
+        pending = pending_counts.get(route.id, 0)
+
         analysis[route.route_code] = {
             "route_name": f"{route.origin_name} → {route.destination_name}",
             "pending_passengers": pending,
@@ -272,22 +345,30 @@ def _analyze_route_opportunities(db: Session, driver: Driver) -> Dict:
 
 def _get_pending_bookings_heatmap(db: Session) -> List[Dict]:
     """Get locations of pending bookings for map visualization"""
-    
+    from sqlalchemy import func
+
     recent_threshold = datetime.utcnow() - timedelta(minutes=5)
-    
-    pending = db.query(BookingRequest).filter(
-        BookingRequest.request_status == "SEARCHING",
+
+    # Columnar fetch with the wait-time math done in SQL - no ORM
+    # objects or per-row timedelta arithmetic
+    pending = db.query(
+        BookingRequest.request_lat,
+        BookingRequest.request_lng,
+        BookingRequest.route_id,
+        (func.extract('epoch', func.now() - BookingRequest.requested_at) / 60).label('wait_mins')
+    ).filter(
+        BookingRequest.request_status == RequestStatus.SEARCHING,
         BookingRequest.requested_at >= recent_threshold
     ).all()
-    
+
     return [
         {
-            "lat": float(b.request_lat),
-            "lng": float(b.request_lng),
-            "route_id": b.route_id,
-            "wait_time_mins": round((datetime.utcnow() - b.requested_at).total_seconds() / 60, 1)
+            "lat": float(lat),
+            "lng": float(lng),
+            "route_id": route_id,
+            "wait_time_mins": round(float(wait_mins), 1)
         }
-        for b in pending
+        for lat, lng, route_id, wait_mins in pending
     ]
 
 
@@ -325,16 +406,6 @@ def _generate_optimization_suggestion(
     )
 
 
-def _is_short_route_booking(booking: BookingRequest, route: Route) -> bool:
-    """
-    Determine if booking is for short route (halfway) or full route
-    This would be based on user's selected destination in real app
-    For now, placeholder logic
-    """
-    # TODO: Add destination tracking to BookingRequest model
-    return False  # Placeholder
-
-
 def _generate_route_recommendation(profit_analysis: Dict) -> str:
     """Generate human-readable recommendation"""
     
@@ -22,7 +22,7 @@ router = APIRouter(prefix="/queue", tags=["Queue"])
 
 
 @router.post("/join", response_model=JoinQueueResponse)
-async def join_queue(
+def join_queue(
     request: JoinQueueRequest,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -53,7 +53,7 @@ async def join_queue(
             women_only=request.women_only_preference
         )
         
-        return JoinQueueResponse(**result)
+        return JoinQueueResponse.from_trusted(result)
         
     except ValueError as e:
         raise HTTPException(
@@ -68,7 +68,7 @@ async def join_queue(
 
 
 @router.get("/status", response_model=QueueStatusResponse)
-async def get_queue_status(
+def get_queue_status(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -88,7 +88,7 @@ async def get_queue_status(
         
         status = queue_service.get_queue_status(current_user.id)
         
-        return QueueStatusResponse(**status)
+        return QueueStatusResponse.from_trusted(status)
         
     except Exception as e:
         raise HTTPException(
@@ -98,7 +98,7 @@ async def get_queue_status(
 
 
 @router.post("/leave", response_model=LeaveQueueResponse)
-async def leave_queue(
+def leave_queue(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -116,7 +116,7 @@ async def leave_queue(
         
         result = queue_service.leave_queue(current_user.id)
         
-        return LeaveQueueResponse(**result)
+        return LeaveQueueResponse.from_trusted(result)
         
     except ValueError as e:
         raise HTTPException(
@@ -131,7 +131,7 @@ async def leave_queue(
 
 
 @router.get("/nearby-groups")
-async def get_nearby_groups(
+def get_nearby_groups(
     route_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -163,7 +163,7 @@ async def get_nearby_groups(
 
 
 @router.get("/analytics/summary")
-async def get_queue_analytics(
+def get_queue_analytics(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -176,26 +176,31 @@ async def get_queue_analytics(
     from app.models.ride_group import RideGroup, GroupStatus
     from sqlalchemy import func
     
-    # Count groups by status
-    status_counts = db.query(
+    # One grouped scan yields both the per-status counts and the
+    # FORMING-only averages (read off that status's row)
+    rows = db.query(
         RideGroup.group_status,
-        func.count(RideGroup.id)
+        func.count(RideGroup.id),
+        func.avg(func.coalesce(
+            func.extract('epoch', func.now() - RideGroup.first_user_joined_at), 0
+        )),
+        func.avg(RideGroup.current_size)
     ).group_by(RideGroup.group_status).all()
-    
-    # Get forming groups details
-    forming_groups = db.query(RideGroup).filter(
-        RideGroup.group_status == GroupStatus.FORMING
-    ).all()
-    
-    avg_wait_time = sum(g.get_wait_time_seconds() for g in forming_groups) / len(forming_groups) if forming_groups else 0
-    avg_size = sum(g.current_size for g in forming_groups) / len(forming_groups) if forming_groups else 0
-    
+
+    status_counts = {group_status: n for group_status, n, _, _ in rows}
+
+    forming_count, avg_wait_time, avg_size = 0, 0, 0
+    for group_status, n, avg_wait, avg_sz in rows:
+        if group_status == GroupStatus.FORMING:
+            forming_count, avg_wait_time, avg_size = n, avg_wait, avg_sz
+            break
+
     return {
-        'total_forming_groups': len(forming_groups),
-        'average_wait_time_seconds': int(avg_wait_time),
-        'average_group_size': round(avg_size, 1),
-        'groups_by_status': dict(status_counts),
-        'system_health': 'HEALTHY' if len(forming_groups) < 20 else 'BUSY'
+        'total_forming_groups': forming_count,
+        'average_wait_time_seconds': int(avg_wait_time or 0),
+        'average_group_size': round(float(avg_size or 0), 1),
+        'groups_by_status': status_counts,
+        'system_health': 'HEALTHY' if forming_count < 20 else 'BUSY'
     }
 
 
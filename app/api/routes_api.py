@@ -3,76 +3,96 @@ Routes API Endpoints
 Manage rickshaw routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List
+import json
+import time
+
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode()
 
 from app.database.session import get_db
 from app.models.driver import Route
+from app.schemas.route_schema import RouteOut, RouteDetailOut
 
 router = APIRouter(prefix="/routes", tags=["Routes"])
 
+# Route data changes rarely (admin seeding only), so serve the list and
+# per-route payloads from an in-process TTL cache and skip the SELECT,
+# hydration and float() conversions on repeat requests.
+# Maps "all" or route_id -> (expires_at, payload)
+_ROUTES_CACHE: Dict[object, tuple] = {}
+_ROUTES_CACHE_TTL_SECONDS = 60.0
+
+
+def invalidate_routes_cache():
+    """Drop cached route payloads (call after route mutations)"""
+    _ROUTES_CACHE.clear()
+
 
-@router.get("/")
-async def get_all_routes(db: Session = Depends(get_db)):
+@router.get("/", response_model=List[RouteOut])
+def get_all_routes(db: Session = Depends(get_db)):
     """
     Get all active routes
     """
-    routes = db.query(Route).filter(Route.is_active == True).all()
-    
-    return [
-        {
-            "id": r.id,
-            "route_code": r.route_code,
-            "origin_name": r.origin_name,
-            "destination_name": r.destination_name,
-            "distance_km": float(r.distance_km),
-            "estimated_duration_mins": r.estimated_duration_mins,
-            "short_route_fare": float(r.short_route_fare),
-            "full_route_fare": float(r.full_route_fare),
-            "origin": {
-                "lat": float(r.origin_lat),
-                "lng": float(r.origin_lng)
-            },
-            "destination": {
-                "lat": float(r.dest_lat),
-                "lng": float(r.dest_lng)
-            }
-        }
-        for r in routes
-    ]
-
-
-@router.get("/{route_id}")
-async def get_route(route_id: int, db: Session = Depends(get_db)):
+    cached = _ROUTES_CACHE.get("all")
+    if cached and cached[0] > time.monotonic():
+        # Pre-serialized bytes - the whole response pipeline is skipped
+        return Response(content=cached[1], media_type="application/json")
+
+    # Core select of plain tuples - skips ORM instance construction
+    # and identity-map bookkeeping on this read-only path
+    routes = db.execute(
+        select(
+            Route.id, Route.route_code, Route.origin_name,
+            Route.destination_name, Route.distance_km,
+            Route.estimated_duration_mins, Route.short_route_fare,
+            Route.full_route_fare, Route.origin_lat, Route.origin_lng,
+            Route.dest_lat, Route.dest_lng
+        ).where(Route.is_active == True)
+    ).all()
+
+    # RouteOut nests origin/destination itself - no hand-rolled dicts.
+    # Serialize once and cache the wire bytes, not the objects.
+    result = [RouteOut.model_validate(r) for r in routes]
+    body = _dumps([m.model_dump() for m in result])
+
+    _ROUTES_CACHE["all"] = (time.monotonic() + _ROUTES_CACHE_TTL_SECONDS, body)
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/{route_id}", response_model=RouteDetailOut)
+def get_route(route_id: int, db: Session = Depends(get_db)):
     """
     Get specific route details
     """
-    route = db.query(Route).filter(Route.id == route_id).first()
-    
+    cached = _ROUTES_CACHE.get(route_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    route = db.execute(
+        select(
+            Route.id, Route.route_code, Route.origin_name,
+            Route.destination_name, Route.distance_km,
+            Route.estimated_duration_mins, Route.short_route_fare,
+            Route.full_route_fare, Route.halfway_point_km, Route.is_active,
+            Route.origin_lat, Route.origin_lng, Route.dest_lat, Route.dest_lng
+        ).where(Route.id == route_id)
+    ).first()
+
     if not route:
         raise HTTPException(status_code=404, detail="Route not found")
-    
-    return {
-        "id": route.id,
-        "route_code": route.route_code,
-        "origin_name": route.origin_name,
-        "destination_name": route.destination_name,
-        "distance_km": float(route.distance_km),
-        "estimated_duration_mins": route.estimated_duration_mins,
-        "short_route_fare": float(route.short_route_fare),
-        "full_route_fare": float(route.full_route_fare),
-        "halfway_point_km": float(route.halfway_point_km),
-        "is_active": route.is_active,
-        "origin": {
-            "lat": float(route.origin_lat),
-            "lng": float(route.origin_lng)
-        },
-        "destination": {
-            "lat": float(route.dest_lat),
-            "lng": float(route.dest_lng)
-        }
-    }
+
+    result = RouteDetailOut.model_validate(route)
+
+    _ROUTES_CACHE[route_id] = (time.monotonic() + _ROUTES_CACHE_TTL_SECONDS, result)
+    return result
 
 
 @router.get("/test")
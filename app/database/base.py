@@ -3,9 +3,13 @@ SQLAlchemy Base Class
 All models inherit from this
 """
 
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import DeclarativeBase
+
+
+class Base(DeclarativeBase):
+    """SQLAlchemy 2.0-style declarative base"""
+    pass
 
-Base = declarative_base()
 
 # Models will be imported by alembic/env.py when needed
 # Do NOT import models here to avoid circular imports
@@ -3,9 +3,9 @@ Database Session Configuration
 PostgreSQL connection with connection pooling
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import NullPool, QueuePool
 from contextlib import contextmanager
 import logging
 
@@ -13,17 +13,31 @@ from app.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
-# Create SQLAlchemy engine with connection pooling
-engine = create_engine(
-    settings.DATABASE_URL,
-    poolclass=QueuePool,
-    pool_size=10,          # Number of connections to maintain
-    max_overflow=20,       # Max connections beyond pool_size
-    pool_timeout=30,       # Timeout for getting connection
-    pool_recycle=3600,     # Recycle connections after 1 hour
-    pool_pre_ping=True,    # Test connections before using
-    echo=settings.DEBUG    # Log SQL queries in debug mode
-)
+if settings.DB_EXTERNAL_POOLING:
+    # PgBouncer (transaction mode) owns the pool - don't double-pool
+    # in-process, just open/close against the pooler per checkout
+    engine = create_engine(
+        settings.DATABASE_URL,
+        poolclass=NullPool,
+        query_cache_size=1200,  # Hot statement shapes stay compiled
+        echo=settings.DEBUG
+    )
+else:
+    # Create SQLAlchemy engine with connection pooling. Sizing comes
+    # from settings so deployments can keep
+    # workers x (pool_size + max_overflow) under PG max_connections.
+    engine = create_engine(
+        settings.DATABASE_URL,
+        poolclass=QueuePool,
+        pool_size=settings.DB_POOL_SIZE,        # Connections to maintain
+        max_overflow=settings.DB_MAX_OVERFLOW,  # Max beyond pool_size
+        pool_timeout=30,       # Timeout for getting connection
+        pool_recycle=3600,     # Recycle connections after 1 hour
+        pool_pre_ping=True,    # Test connections before using
+        pool_use_lifo=True,    # Reuse the warmest connection first
+        query_cache_size=1200,  # Hot statement shapes stay compiled
+        echo=settings.DEBUG    # Log SQL queries in debug mode
+    )
 
 # Create session factory
 SessionLocal = sessionmaker(
@@ -70,27 +84,79 @@ def get_db_context():
         db.close()
 
 
+def stream_rows(query, chunk_size: int = 1000):
+    """
+    Stream a large ORM query through a server-side cursor
+
+    Wraps Query.yield_per so bulk readers (historical rebuilds,
+    dispatch-log exports, admin dumps) hold O(chunk_size) rows in
+    memory instead of buffering the full result set client-side.
+
+    Usage:
+        for booking in stream_rows(db.query(BookingRequest).filter(...)):
+            process(booking)
+    """
+    return query.yield_per(chunk_size)
+
+
+# Pre-aggregated per-route booking stats for dashboard reads.
+# Refreshed on the dispatch scheduler's cadence; REFRESH CONCURRENTLY
+# needs the unique index.
+_ROUTE_HOT_STATS_DDL = (
+    """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS route_hot_stats AS
+    SELECT route_id,
+           COUNT(*) FILTER (WHERE request_status = 'SEARCHING') AS pending_bookings,
+           COUNT(*) AS total_bookings
+    FROM booking_requests
+    GROUP BY route_id
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_route_hot_stats_route ON route_hot_stats (route_id)",
+)
+
+
 def init_db():
     """
     Initialize database - create all tables
     Should be called at application startup
     """
     from app.database.base import Base
-    
+    import app.models  # noqa: F401 - registers tables on Base.metadata
+
     logger.info("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as conn:
+            for ddl in _ROUTE_HOT_STATS_DDL:
+                conn.execute(text(ddl))
+            conn.commit()
+
     logger.info("✅ Database tables created successfully")
 
 
+def refresh_route_hot_stats():
+    """Refresh the pre-aggregated route stats (Postgres only)"""
+    if engine.dialect.name != 'postgresql':
+        return
+
+    # REFRESH ... CONCURRENTLY refuses to run inside a transaction
+    # block, so it needs an autocommit connection
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY route_hot_stats"))
+
+
 def check_db_connection() -> bool:
     """
     Check if database connection is working
     Returns True if healthy, False otherwise
     """
     try:
-        # Try to connect and execute a simple query
+        # Try to connect and execute a simple query. pool_pre_ping on
+        # the engine keeps checkouts warm; text() is required - 2.0
+        # rejects raw SQL strings
         with engine.connect() as conn:
-            conn.execute("SELECT 1")
+            conn.execute(text("SELECT 1"))
         return True
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
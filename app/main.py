@@ -3,11 +3,14 @@ RickQueue Backend - FastAPI Application
 Focus: Operational Excellence & Smart Dispatch (NO Payment Processing)
 """
 
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from sqlalchemy import text
+import hashlib
 import socketio
 import logging
+import time
 
 from app.config.settings import settings
 from app.database.session import engine, init_db
@@ -18,6 +21,14 @@ from app.websocket.manager import init_socketio
 # Import routers
 from app.api import auth, queue, driver, routes_api
 
+# orjson serializes responses several times faster than json.dumps;
+# fall back to the stdlib encoder when it isn't installed
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponseClass
+except ImportError:
+    from fastapi.responses import JSONResponse as DefaultResponseClass
+
 # Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,14 +49,36 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Database initialization failed: {e}")
     
+    # Initialize Firebase at startup so the first authenticated request
+    # doesn't pay for SDK setup and the public-key fetch
+    try:
+        from app.services.auth_service import initialize_firebase
+        initialize_firebase()
+    except Exception as e:
+        logger.error(f"Firebase initialization failed: {e}")
+
+    # Wire Socket.IO into the notification service and remember the
+    # serving loop for cross-thread scheduling
+    from app.services.notification_service import notification_service
+    notification_service.set_socketio(sio)
+
     # Start AI Dispatch Scheduler (runs every 30 seconds)
-    start_smart_dispatch_scheduler()
-    logger.info("🤖 AI Dispatch Scheduler started")
-    
+    try:
+        start_smart_dispatch_scheduler()
+        logger.info("🤖 AI Dispatch Scheduler started")
+    except Exception as e:
+        logger.error(f"Scheduler startup failed: {e}")
+
+    # Periodic bulk-flush of buffered driver location pings
+    from app.services.location_buffer import location_flush_loop
+    import asyncio
+    location_flush_task = asyncio.create_task(location_flush_loop())
+
     yield
-    
+
     # SHUTDOWN
     logger.info("🛑 Shutting down RickQueue Backend...")
+    location_flush_task.cancel()
     stop_smart_dispatch_scheduler()
     logger.info("✅ AI Scheduler stopped")
 
@@ -55,7 +88,8 @@ app = FastAPI(
     title="RickQueue API",
     description="Smart Queue Management for Shared E-Rickshaws",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=DefaultResponseClass
 )
 
 # CORS Configuration
@@ -68,6 +102,41 @@ app.add_middleware(
     expose_headers=["*"],  # ← Also add this
 )
 
+# ===== ETAG / 304 SHORT-CIRCUIT =====
+
+@app.middleware("http")
+async def etag_middleware(request: Request, call_next):
+    """
+    Attach an ETag to successful GET responses and reply 304 when the
+    client already holds the current body - read-mostly endpoints like
+    /routes/ then skip the transfer entirely
+    """
+    response = await call_next(request)
+
+    if request.method != "GET" or response.status_code != 200:
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+    headers = dict(response.headers)
+    headers["ETag"] = etag
+
+    if request.headers.get("if-none-match") == etag:
+        # Keep the inner middlewares' headers (CORS, Vary, caching) on
+        # the 304 - browsers enforce CORS on revalidations too - but a
+        # bodyless response must not claim the old content-length
+        headers.pop("content-length", None)
+        return Response(status_code=304, headers=headers)
+
+    return Response(
+        content=body,
+        status_code=response.status_code,
+        headers=headers,
+        media_type=response.media_type
+    )
+
+
 # ===== HEALTH CHECK =====
 @app.get("/")
 async def root():
@@ -79,25 +148,32 @@ async def root():
     }
 
 
+# Probes arrive from every monitor/pod at once; remember the last DB
+# answer for a second so they don't each open a connection
+_DB_HEALTH_CACHE = [0.0, "unknown"]  # [expires_at, status]
+
+
 @app.get("/health")
-async def health_check():
+def health_check():
     """
     Health check endpoint for monitoring
     """
-    from app.database.session import get_db
-    
-    try:
-        # Test database connection
-        db = next(get_db())
-        db.execute("SELECT 1")
-        db_status = "healthy"
-    except Exception as e:
-        logger.error(f"Database health check failed: {e}")
-        db_status = "unhealthy"
-    
+    now = time.monotonic()
+
+    if now >= _DB_HEALTH_CACHE[0]:
+        try:
+            # Plain engine connection - no Session or generator involved
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            _DB_HEALTH_CACHE[1] = "healthy"
+        except Exception as e:
+            logger.error(f"Database health check failed: {e}")
+            _DB_HEALTH_CACHE[1] = "unhealthy"
+        _DB_HEALTH_CACHE[0] = now + 1.0
+
     return {
         "status": "ok",
-        "database": db_status,
+        "database": _DB_HEALTH_CACHE[1],
         "ai_scheduler": "running"  # Could add actual scheduler status check
     }
 
@@ -167,18 +243,28 @@ socket_app = socketio.ASGIApp(sio, app)
 
 # ===== ADMIN ENDPOINTS (for testing) =====
 
+@app.get("/admin/pool-stats")
+def pool_stats():
+    """
+    Connection pool statistics, for sizing the pool empirically
+    """
+    from app.database.session import get_db_stats
+
+    return get_db_stats()
+
+
+
 @app.post("/admin/seed-routes")
 async def seed_sample_routes():
     """
     Seed database with sample routes (for development)
     """
-    from app.database.session import get_db
+    from sqlalchemy.dialects.postgresql import insert
+    from app.database.session import SessionLocal
     from app.models.driver import Route
-    
-    db = next(get_db())
-    
+
     sample_routes = [
-        Route(
+        dict(
             route_code="METRO_COLLEGE_A",
             origin_name="Metro Station Gate 1",
             destination_name="City College",
@@ -192,7 +278,7 @@ async def seed_sample_routes():
             short_route_fare=30.0,
             full_route_fare=50.0
         ),
-        Route(
+        dict(
             route_code="MARKET_HOSPITAL_B",
             origin_name="Central Market",
             destination_name="City Hospital",
@@ -207,22 +293,51 @@ async def seed_sample_routes():
             full_route_fare=40.0
         )
     ]
-    
-    for route in sample_routes:
-        existing = db.query(Route).filter(Route.route_code == route.route_code).first()
-        if not existing:
-            db.add(route)
-    
-    db.commit()
-    
+
+    # One upsert round-trip; existing route codes are left untouched
+    with SessionLocal() as db:
+        db.execute(
+            insert(Route).values(sample_routes).on_conflict_do_nothing(
+                index_elements=["route_code"]
+            )
+        )
+        db.commit()
+
+    # Route data changed - drop cached responses and cached route rows
+    # (get_route negative-caches unknown ids, so a pre-seed failed join
+    # would otherwise keep rejecting the new route for up to a minute)
+    from app.api.routes_api import invalidate_routes_cache
+    from app.services.route_cache import invalidate_route_cache
+    invalidate_routes_cache()
+    invalidate_route_cache()
+
     return {"message": "Sample routes seeded successfully"}
 
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run(
-        "app.main:socket_app",  # Use socket_app instead of app
-        host="0.0.0.0",
-        port=8000,
-        reload=settings.DEBUG
-    )
\ No newline at end of file
+
+    if settings.DEBUG:
+        # reload and workers are mutually exclusive
+        uvicorn.run(
+            "app.main:socket_app",  # Use socket_app instead of app
+            host="0.0.0.0",
+            port=8000,
+            reload=True
+        )
+    else:
+        # uvloop + httptools (bundled with uvicorn[standard]) roughly
+        # double event-loop throughput. Raise WEB_CONCURRENCY to use
+        # more cores - a Postgres advisory lock elects a single worker
+        # to run the background scheduler, but Socket.IO rooms stay
+        # worker-local unless a message-queue client manager is
+        # configured
+        uvicorn.run(
+            "app.main:socket_app",
+            host="0.0.0.0",
+            port=8000,
+            workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+            loop="uvloop",
+            http="httptools"
+        )
\ No newline at end of file
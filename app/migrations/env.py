@@ -15,6 +15,11 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from app.config.settings import settings
 from app.database.base import Base
 
+# Models must be imported here (and only here) so their tables are
+# registered on Base.metadata for autogenerate; base.py itself stays
+# import-free to avoid circular imports and app-startup cost
+import app.models  # noqa: F401
+
 # Alembic Config object
 config = context.config
 
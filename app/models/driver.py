@@ -3,7 +3,7 @@ Driver model with optimization tracking
 Focus: Time & Profit optimization (NO payment processing)
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, Float, Numeric, DateTime, ForeignKey, Enum, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -21,6 +21,15 @@ class VerificationStatus(str, enum.Enum):
 class Driver(Base):
     __tablename__ = "drivers"
 
+    __table_args__ = (
+        # "Find nearby available driver" filters online/available then
+        # bounds-checks lat/lng - one partial composite index covers it
+        # (Postgres only)
+        Index("idx_driver_online_loc", "is_online", "is_available",
+              "current_lat", "current_lng",
+              postgresql_where=text("is_online AND is_available")),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     firebase_uid = Column(String(128), unique=True, nullable=False, index=True)
     phone_number = Column(String(15), unique=True, nullable=False, index=True)
@@ -40,14 +49,14 @@ class Driver(Base):
     # Real-time Status
     is_online = Column(Boolean, default=False, index=True)
     is_available = Column(Boolean, default=True)  # Not on active trip
-    current_lat = Column(Float, nullable=True, index=True)
-    current_lng = Column(Float, nullable=True, index=True)
+    current_lat = Column(Float, nullable=True)
+    current_lng = Column(Float, nullable=True)
     last_location_update = Column(DateTime(timezone=True), nullable=True)
     
     # Performance Metrics (for driver dashboard)
     total_trips_completed = Column(Integer, default=0)
     avg_rating = Column(Float, default=5.0)
-    total_earnings_today = Column(Float, default=0.0)  # Just tracking, not payment
+    total_earnings_today = Column(Numeric(8, 2), default=0.0)  # Just tracking, not payment
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
@@ -56,7 +65,7 @@ class Driver(Base):
     completed_rides = relationship("Ride", back_populates="driver")
     
     def __repr__(self):
-        return f"<Driver(id={self.id}, name={self.full_name}, online={self.is_online})>"
+        return f"<Driver(id={self.id})>"
 
 
 class Route(Base):
@@ -66,6 +75,12 @@ class Route(Base):
     """
     __tablename__ = "routes"
 
+    __table_args__ = (
+        # Serves the active-routes listing without a seq scan (Postgres
+        # partial index)
+        Index('ix_route_active', 'id', postgresql_where=text('is_active = true')),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     route_code = Column(String(20), unique=True, nullable=False, index=True)
     
@@ -84,8 +99,10 @@ class Route(Base):
     # Pricing Tiers (for driver optimization calculation)
     # NO payment processing, just metrics for driver decision-making
     halfway_point_km = Column(Float, nullable=False)  # e.g., 2.5 km on a 5km route
-    short_route_fare = Column(Float, nullable=False)  # Half price
-    full_route_fare = Column(Float, nullable=False)   # Complete route
+    # Fares are 2-decimal currency - Numeric(6,2) stores them exactly
+    # in half the width of a float8
+    short_route_fare = Column(Numeric(6, 2), nullable=False)  # Half price
+    full_route_fare = Column(Numeric(6, 2), nullable=False)   # Complete route
     
     # Optimization Metadata
     is_high_demand = Column(Boolean, default=False)  # Peak hours
@@ -125,6 +142,60 @@ class Route(Base):
         }
 
 
+def calculate_profit_potential_batch(routes, short_counts, full_counts):
+    """
+    Vectorized calculate_profit_potential across many routes
+
+    Args:
+        routes: sequence of Route rows (reads fares and duration)
+        short_counts, full_counts: per-route passenger counts
+
+    Returns: list of the same per-route dicts the scalar method builds
+    """
+    import numpy as np
+
+    n = len(routes)
+    short_n = np.asarray(short_counts, dtype=np.float64)
+    full_n = np.asarray(full_counts, dtype=np.float64)
+
+    short_fares = np.fromiter(
+        (r.short_route_fare for r in routes), dtype=np.float64, count=n
+    )
+    full_fares = np.fromiter(
+        (r.full_route_fare for r in routes), dtype=np.float64, count=n
+    )
+    durations = np.fromiter(
+        (r.estimated_duration_mins for r in routes), dtype=np.float64, count=n
+    )
+
+    short_revenue = short_n * short_fares
+    full_revenue = full_n * full_fares
+    short_time = durations * 0.5  # Halfway
+    full_time = durations
+
+    with np.errstate(divide='ignore'):
+        short_tph = np.where(short_time > 0, 60 / short_time, 0)
+        full_tph = np.where(full_time > 0, 60 / full_time, 0)
+
+    return [
+        {
+            "short_route": {
+                "passengers": int(short_n[i]),
+                "revenue": short_revenue[i],
+                "time_mins": short_time[i],
+                "trips_per_hour": short_tph[i]
+            },
+            "full_route": {
+                "passengers": int(full_n[i]),
+                "revenue": full_revenue[i],
+                "time_mins": full_time[i],
+                "trips_per_hour": full_tph[i]
+            }
+        }
+        for i in range(n)
+    ]
+
+
 # User model is in app/models/user.py - don't duplicate here!
 
 
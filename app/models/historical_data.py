@@ -3,10 +3,9 @@ Historical Arrival Data Model
 Stores learned patterns for AI predictions
 """
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, UniqueConstraint, Index
+from sqlalchemy import Column, Integer, SmallInteger, String, Float, ForeignKey, UniqueConstraint, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-from datetime import datetime
 
 from app.database.base import Base
 
@@ -19,15 +18,18 @@ class HistoricalArrivalData(Base):
     __tablename__ = "historical_arrival_data"
     
     __table_args__ = (
-        UniqueConstraint('route_id', 'day_of_week', 'hour_of_day', 'time_slot', 
-                        name='uq_route_time_slot'),
-        Index('idx_route_time', 'route_id', 'day_of_week', 'hour_of_day'),
+        UniqueConstraint('route_id', 'time_bucket', name='uq_route_time_bucket'),
+        Index('idx_route_time', 'route_id', 'time_bucket'),
     )
 
     id = Column(Integer, primary_key=True, index=True)
     route_id = Column(Integer, ForeignKey("routes.id"), nullable=False, index=True)
-    
+
     # Time Bucketing
+    # time_bucket packs (day_of_week << 6) | (hour_of_day << 1) | half -
+    # one small-int compare and a 2-column unique index on the hot
+    # lookup instead of a 4-column composite walk
+    time_bucket = Column(SmallInteger, nullable=False)
     day_of_week = Column(Integer, nullable=False)  # 1=Mon, 7=Sun
     hour_of_day = Column(Integer, nullable=False)  # 0-23
     time_slot = Column(String(20), nullable=False)  # "09:00-09:30"
@@ -41,18 +43,20 @@ class HistoricalArrivalData(Base):
     # Calculated Probability (Pre-computed for fast lookup)
     arrival_probability_score = Column(Float, default=50.0)  # 0-100%
     
-    # Metadata
-    last_updated = Column(Integer, default=lambda: int(datetime.utcnow().timestamp()))
+    # Metadata (epoch seconds; stamped by the database so bulk inserts
+    # don't call back into Python per row)
+    last_updated = Column(Integer, server_default=text("(date_part('epoch', now()))"))
     
     # Relationships
     route = relationship("Route")
+
+    @staticmethod
+    def pack_time_bucket(day_of_week: int, hour_of_day: int, half_hour: int = 0) -> int:
+        """Pack (day, hour, half-hour) into the 9-bit bucket key"""
+        return (day_of_week << 6) | (hour_of_day << 1) | half_hour
     
     def __repr__(self):
-        return (
-            f"<HistoricalArrivalData(route={self.route_id}, "
-            f"day={self.day_of_week}, hour={self.hour_of_day}, "
-            f"probability={self.arrival_probability_score}%)>"
-        )
+        return f"<HistoricalArrivalData(id={self.id})>"
     
     def to_dict(self) -> dict:
         """Convert to dictionary for API responses"""
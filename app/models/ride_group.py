@@ -3,7 +3,7 @@ Ride Group Models
 Contains: RideGroup, GroupMember, BookingRequest, DispatchDecisionLog
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, Enum, Text
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, Enum, Text, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -26,9 +26,25 @@ class DispatchDecisionType(str, enum.Enum):
     FORCED = "FORCED"
 
 
+class RequestStatus(str, enum.Enum):
+    SEARCHING = "SEARCHING"
+    GROUPED = "GROUPED"
+    CANCELLED = "CANCELLED"
+
+
 class RideGroup(Base):
     __tablename__ = "ride_groups"
 
+    __table_args__ = (
+        # Serves the driver dashboard's "READY and unassigned" scan
+        # (Postgres partial index)
+        Index('idx_group_status_unassigned', 'group_status', 'assigned_driver_id',
+              postgresql_where=text('assigned_driver_id IS NULL')),
+        # Serves the join-queue best-match lookup (Postgres only)
+        Index('ix_ridegroup_match', 'route_id', 'women_only', 'current_size',
+              postgresql_where=text("group_status = 'FORMING'")),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     route_id = Column(Integer, ForeignKey("routes.id"), nullable=False, index=True)
     
@@ -66,15 +82,20 @@ class RideGroup(Base):
             return False
         return True
     
-    def get_wait_time_seconds(self) -> int:
-        """Calculate how long the first user has been waiting"""
+    def get_wait_time_seconds(self, now: datetime = None) -> int:
+        """
+        Calculate how long the first user has been waiting
+
+        Batch callers pass one `now` so a single clock read serves all
+        groups in the loop.
+        """
         if not self.first_user_joined_at:
             return 0
-        delta = datetime.utcnow() - self.first_user_joined_at
+        delta = (now or datetime.utcnow()) - self.first_user_joined_at
         return int(delta.total_seconds())
     
     def __repr__(self):
-        return f"<RideGroup(id={self.id}, status={self.group_status}, size={self.current_size}/{self.max_size})>"
+        return f"<RideGroup(id={self.id})>"
 
 
 class GroupMember(Base):
@@ -91,22 +112,37 @@ class GroupMember(Base):
     
     # Relationships
     ride_group = relationship("RideGroup", back_populates="members")
-    user = relationship("User", back_populates="group_memberships")
+    # Members are only ever loaded to show who's in the group, so fetch
+    # their users in one batched SELECT instead of one per member
+    user = relationship("User", back_populates="group_memberships", lazy="selectin")
     
     def __repr__(self):
-        return f"<GroupMember(group_id={self.group_id}, user_id={self.user_id}, seat={self.seat_number})>"
+        return f"<GroupMember(id={self.id})>"
 
 
 class BookingRequest(Base):
     __tablename__ = "booking_requests"
 
+    __table_args__ = (
+        # Matches the historical-data lookback query (route + time range)
+        Index('idx_booking_route_requested', 'route_id', 'requested_at'),
+        # Partial index for the hot "pending bookings" scans (Postgres only)
+        Index('idx_booking_searching_route', 'route_id', 'requested_at',
+              postgresql_where=text("request_status = 'SEARCHING'")),
+        # Serves the cross-route heatmap window (status + recency)
+        Index('idx_booking_status_requested', 'request_status', 'requested_at'),
+        # Proximity scans over pending bookings (Postgres only)
+        Index('idx_booking_searching_loc', 'route_id', 'request_lat', 'request_lng',
+              postgresql_where=text("request_status = 'SEARCHING'")),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     route_id = Column(Integer, ForeignKey("routes.id"), nullable=False, index=True)
     
     request_status = Column(
-        Enum("SEARCHING", "GROUPED", "CANCELLED", name="request_status_enum"),
-        default="SEARCHING",
+        Enum(RequestStatus, name="request_status_enum"),
+        default=RequestStatus.SEARCHING,
         nullable=False,
         index=True
     )
@@ -128,7 +164,7 @@ class BookingRequest(Base):
     ride_group = relationship("RideGroup", back_populates="booking_requests")
     
     def __repr__(self):
-        return f"<BookingRequest(id={self.id}, user_id={self.user_id}, status={self.request_status})>"
+        return f"<BookingRequest(id={self.id})>"
 
 
 class DispatchDecisionLog(Base):
@@ -160,4 +196,4 @@ class DispatchDecisionLog(Base):
     ride_group = relationship("RideGroup")
     
     def __repr__(self):
-        return f"<DispatchDecisionLog(group_id={self.group_id}, decision={self.decision_made})>"
\ No newline at end of file
+        return f"<DispatchDecisionLog(id={self.id})>"
\ No newline at end of file
@@ -35,4 +35,4 @@ class User(Base):
     booking_requests = relationship("BookingRequest", back_populates="user")
     
     def __repr__(self):
-        return f"<User(id={self.id}, name={self.full_name}, phone={self.phone_number})>"
\ No newline at end of file
+        return f"<User(id={self.id})>"
\ No newline at end of file
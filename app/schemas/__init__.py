@@ -10,10 +10,16 @@ from app.schemas.driver_schema import (
 from app.schemas.queue_schema import (
     JoinQueueRequest, JoinQueueResponse, QueueStatusResponse, LeaveQueueResponse
 )
+from app.schemas.route_schema import RouteCoord, RouteOut, RouteDetailOut
+from app.schemas.booking_schema import (
+    BookingStatus, Location, BookingRequestCreate, BookingRequestUpdate
+)
 
 __all__ = [
     'UserBase', 'UserCreate', 'UserUpdate', 'UserResponse',
     'DriverBase', 'DriverCreate', 'DriverUpdate', 'DriverResponse',
     'DriverDashboardResponse', 'RouteOpportunity', 'OptimizationSuggestion',
-    'JoinQueueRequest', 'JoinQueueResponse', 'QueueStatusResponse', 'LeaveQueueResponse'
+    'JoinQueueRequest', 'JoinQueueResponse', 'QueueStatusResponse', 'LeaveQueueResponse',
+    'RouteCoord', 'RouteOut', 'RouteDetailOut',
+    'BookingStatus', 'Location', 'BookingRequestCreate', 'BookingRequestUpdate'
 ]
@@ -37,7 +37,21 @@ class RouteInfo(BaseModel):
     distance_km: float
 
 
-class JoinQueueResponse(BaseModel):
+class TrustedResponse(BaseModel):
+    """
+    Base for responses built from service-layer dicts
+
+    The queue service produces these values itself (they never come
+    from the client), so from_trusted skips field validation via
+    model_construct; FastAPI still shapes the payload on serialization.
+    """
+
+    @classmethod
+    def from_trusted(cls, data: dict):
+        return cls.model_construct(**data)
+
+
+class JoinQueueResponse(TrustedResponse):
     """
     Response after joining queue
     """
@@ -84,7 +98,7 @@ class PassengerInfo(BaseModel):
     seat: int
 
 
-class QueueStatusResponse(BaseModel):
+class QueueStatusResponse(TrustedResponse):
     """
     Current queue/group status
     """
@@ -132,7 +146,7 @@ class QueueStatusResponse(BaseModel):
         }
 
 
-class LeaveQueueResponse(BaseModel):
+class LeaveQueueResponse(TrustedResponse):
     """
     Response after leaving queue
     """
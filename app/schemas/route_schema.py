@@ -0,0 +1,67 @@
+"""
+Route Pydantic Schemas
+"""
+
+import operator
+
+from pydantic import BaseModel, model_validator
+
+# Per-schema attrgetter, built once - C-level attribute access for the
+# row-to-dict step instead of a Python getattr per field per row
+_row_getters = {}
+
+
+def _getter_for(cls):
+    cached = _row_getters.get(cls)
+    if cached is None:
+        names = tuple(
+            name for name in cls.model_fields
+            if name not in ('origin', 'destination')
+        )
+        getter = operator.attrgetter(
+            *names, 'origin_lat', 'origin_lng', 'dest_lat', 'dest_lng'
+        )
+        cached = (names, getter)
+        _row_getters[cls] = cached
+    return cached
+
+
+class RouteCoord(BaseModel):
+    lat: float
+    lng: float
+
+
+class RouteOut(BaseModel):
+    id: int
+    route_code: str
+    origin_name: str
+    destination_name: str
+    distance_km: float
+    estimated_duration_mins: int
+    short_route_fare: float
+    full_route_fare: float
+    origin: RouteCoord
+    destination: RouteCoord
+
+    class Config:
+        from_attributes = True
+
+    @model_validator(mode='before')
+    @classmethod
+    def _nest_coordinates(cls, data):
+        """Synthesize origin/destination from the flat lat/lng columns"""
+        if isinstance(data, dict):
+            return data
+
+        names, getter = _getter_for(cls)
+        values = getter(data)
+
+        out = dict(zip(names, values))
+        out['origin'] = {'lat': values[-4], 'lng': values[-3]}
+        out['destination'] = {'lat': values[-2], 'lng': values[-1]}
+        return out
+
+
+class RouteDetailOut(RouteOut):
+    halfway_point_km: float
+    is_active: bool
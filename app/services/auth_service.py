@@ -8,7 +8,9 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 import firebase_admin
 from firebase_admin import auth, credentials
+import hashlib
 import logging
+import time
 
 from app.database.session import get_db
 from app.models.user import User
@@ -20,6 +22,22 @@ logger = logging.getLogger(__name__)
 # Security scheme
 security = HTTPBearer()
 
+# Verified-token cache: RSA signature checks cost 5-50ms and run on
+# every authenticated request, but a token's claims can't change while
+# it's valid. Keyed by token hash (never the raw token), entries live
+# at most 30s and never past the token's own expiry.
+_TOKEN_CACHE: dict = {}  # sha256(token) -> (expires_at, decoded claims)
+_TOKEN_CACHE_TTL_SECONDS = 30
+_TOKEN_CACHE_MAX_ENTRIES = 10000
+
+# firebase_uid -> primary key, per model. The mapping is immutable, so
+# repeat authentications skip the secondary-index lookup and fetch the
+# (still fresh) row by primary key instead. The row itself is always
+# re-read so is_active / verification_status stay live; a detached
+# cached ORM object would break the profile-update flow.
+_UID_TO_USER_ID: dict = {}
+_UID_TO_DRIVER_ID: dict = {}
+
 # Initialize Firebase Admin SDK
 def initialize_firebase():
     """
@@ -37,7 +55,7 @@ def initialize_firebase():
         logger.info("Firebase Admin SDK initialized")
 
 
-async def verify_firebase_token(
+def verify_firebase_token(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> dict:
     """
@@ -46,15 +64,31 @@ async def verify_firebase_token(
     """
     
     token = credentials.credentials
-    
+
+    # Serve recently verified tokens from the cache
+    token_hash = hashlib.sha256(token.encode()).digest()
+    cached = _TOKEN_CACHE.get(token_hash)
+    if cached and cached[0] > time.time():
+        return cached[1]
+
     try:
         # Verify the token
         decoded_token = auth.verify_id_token(token)
-        
+
         logger.debug(f"Token verified for user: {decoded_token['uid']}")
-        
+
+        # Cache until shortly before the token itself expires
+        ttl = min(
+            _TOKEN_CACHE_TTL_SECONDS,
+            decoded_token.get('exp', 0) - time.time() - 5
+        )
+        if ttl > 0:
+            if len(_TOKEN_CACHE) >= _TOKEN_CACHE_MAX_ENTRIES:
+                _TOKEN_CACHE.clear()
+            _TOKEN_CACHE[token_hash] = (time.time() + ttl, decoded_token)
+
         return decoded_token
-        
+
     except auth.InvalidIdTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -73,7 +107,7 @@ async def verify_firebase_token(
         )
 
 
-async def get_current_user(
+def get_current_user(
     token_data: dict = Depends(verify_firebase_token),
     db: Session = Depends(get_db)
 ) -> User:
@@ -83,10 +117,16 @@ async def get_current_user(
     """
     
     firebase_uid = token_data['uid']
-    
-    # Find user in database
-    user = db.query(User).filter(User.firebase_uid == firebase_uid).first()
-    
+
+    # Find user in database (by primary key when the uid is known)
+    user_id = _UID_TO_USER_ID.get(firebase_uid)
+    if user_id is not None:
+        user = db.get(User, user_id)
+    else:
+        user = db.query(User).filter(User.firebase_uid == firebase_uid).first()
+        if user:
+            _UID_TO_USER_ID[firebase_uid] = user.id
+
     if not user:
         # First-time login - create user
         # Get additional info from Firebase
@@ -104,7 +144,9 @@ async def get_current_user(
             db.add(user)
             db.commit()
             db.refresh(user)
-            
+
+            _UID_TO_USER_ID[firebase_uid] = user.id
+
             logger.info(f"New user created: {user.id} ({firebase_uid})")
             
         except Exception as e:
@@ -123,7 +165,7 @@ async def get_current_user(
     return user
 
 
-async def get_current_driver(
+def get_current_driver(
     token_data: dict = Depends(verify_firebase_token),
     db: Session = Depends(get_db)
 ) -> Driver:
@@ -133,10 +175,16 @@ async def get_current_driver(
     """
     
     firebase_uid = token_data['uid']
-    
-    # Find driver in database
-    driver = db.query(Driver).filter(Driver.firebase_uid == firebase_uid).first()
-    
+
+    # Find driver in database (by primary key when the uid is known)
+    driver_id = _UID_TO_DRIVER_ID.get(firebase_uid)
+    if driver_id is not None:
+        driver = db.get(Driver, driver_id)
+    else:
+        driver = db.query(Driver).filter(Driver.firebase_uid == firebase_uid).first()
+        if driver:
+            _UID_TO_DRIVER_ID[firebase_uid] = driver.id
+
     if not driver:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -152,7 +200,7 @@ async def get_current_driver(
     return driver
 
 
-async def get_optional_user(
+def get_optional_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User | None:
@@ -162,8 +210,8 @@ async def get_optional_user(
     """
     
     try:
-        token_data = await verify_firebase_token(credentials)
-        return await get_current_user(token_data, db)
+        token_data = verify_firebase_token(credentials)
+        return get_current_user(token_data, db)
     except HTTPException:
         return None
 
@@ -0,0 +1,68 @@
+"""
+Driver Location Buffer
+Coalesces high-frequency location pings into periodic bulk writes
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Dict, Tuple
+import logging
+
+from app.database.session import SessionLocal
+from app.models.driver import Driver
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = 3.0
+
+# driver_id -> (lat, lng, ping time); later pings simply overwrite
+# earlier ones, so the flush only ever writes the freshest position
+_buffer: Dict[int, Tuple[float, float, datetime]] = {}
+
+
+def record_location(driver_id: int, lat: float, lng: float):
+    """Buffer a location ping (no DB work on the socket path)"""
+    _buffer[driver_id] = (lat, lng, datetime.utcnow())
+
+
+def flush_locations() -> int:
+    """
+    Persist all buffered positions in one bulk UPDATE + commit
+    Returns: number of drivers written
+    """
+    if not _buffer:
+        return 0
+
+    # Snapshot and clear so pings arriving during the write aren't lost
+    snapshot = dict(_buffer)
+    _buffer.clear()
+
+    mappings = [
+        {
+            'id': driver_id,
+            'current_lat': lat,
+            'current_lng': lng,
+            'last_location_update': ts
+        }
+        for driver_id, (lat, lng, ts) in snapshot.items()
+    ]
+
+    with SessionLocal() as db:
+        db.bulk_update_mappings(Driver, mappings)
+        db.commit()
+
+    return len(mappings)
+
+
+async def location_flush_loop():
+    """Background task: flush buffered pings every few seconds"""
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+        try:
+            written = await asyncio.to_thread(flush_locations)
+            if written:
+                logger.debug("Flushed %s driver locations", written)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error flushing driver locations: {e}")
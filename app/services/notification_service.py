@@ -16,14 +16,41 @@ class NotificationService:
     Manages real-time notifications via WebSocket
     """
     
+    # Burst joins can fire several group_update emits for one room
+    # within milliseconds; coalesce them into one "latest state" emit
+    COALESCE_WINDOW_SECONDS = 0.05
+
     def __init__(self):
         # Will be set by main.py when Socket.IO initializes
         self.sio = None
-    
+        self._loop = None
+        self._pending_updates = {}   # group_id -> newest notification
+        self._flush_scheduled = set()
+
     def set_socketio(self, sio):
-        """Set Socket.IO instance"""
+        """Set Socket.IO instance (call from within the event loop)"""
         self.sio = sio
-    
+        try:
+            # Remembered so worker threads can hand coroutines back to
+            # the serving loop instead of spinning up their own
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+
+    def _schedule(self, coro):
+        """Schedule a notification coroutine from any thread"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Worker thread - enqueue onto the serving loop
+            if self._loop is not None:
+                asyncio.run_coroutine_threadsafe(coro, self._loop)
+            else:
+                coro.close()
+                logger.warning("No event loop available for notification")
+        else:
+            asyncio.create_task(coro)
+
     async def notify_group_update(
         self,
         group_id: int,
@@ -39,7 +66,7 @@ class NotificationService:
             return
         
         message = self._generate_group_message(current_size, max_size)
-        
+
         notification = {
             'type': 'group_update',
             'group_id': group_id,
@@ -48,16 +75,37 @@ class NotificationService:
             'message': message,
             'timestamp': datetime.utcnow().isoformat()
         }
-        
+
+        # Keep only the newest state per room; one delayed emit covers
+        # every update that lands inside the window
+        self._pending_updates[group_id] = notification
+
+        if group_id in self._flush_scheduled:
+            return
+        self._flush_scheduled.add(group_id)
+
+        loop = asyncio.get_running_loop()
+        loop.call_later(
+            self.COALESCE_WINDOW_SECONDS,
+            lambda: asyncio.ensure_future(self._flush_group_update(group_id))
+        )
+
+    async def _flush_group_update(self, group_id: int):
+        """Emit the newest coalesced state for a group room"""
+        self._flush_scheduled.discard(group_id)
+        notification = self._pending_updates.pop(group_id, None)
+        if notification is None:
+            return
+
         try:
             await self.sio.emit(
                 'group_update',
                 notification,
                 room=f"group_{group_id}"
             )
-            
-            logger.info(f"Sent group update to group {group_id}: {message}")
-            
+
+            logger.info(f"Sent group update to group {group_id}: {notification['message']}")
+
         except Exception as e:
             logger.error(f"Failed to send group update: {e}")
     
@@ -217,8 +265,10 @@ class NotificationService:
         else:
             return f"✨ New passenger joined! ({current_size}/{max_size})"
     
-    # Synchronous wrappers for use in non-async contexts
-    
+    # Synchronous wrappers for use in non-async contexts (scheduler
+    # thread, threadpool handlers) - they enqueue onto the serving loop
+    # and return immediately
+
     def notify_group_update_sync(
         self,
         group_id: int,
@@ -227,20 +277,12 @@ class NotificationService:
     ):
         """Sync wrapper for notify_group_update"""
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # If loop is already running, schedule the task
-                asyncio.create_task(
-                    self.notify_group_update(group_id, current_size, max_size)
-                )
-            else:
-                # Run in new loop
-                asyncio.run(
-                    self.notify_group_update(group_id, current_size, max_size)
-                )
+            self._schedule(
+                self.notify_group_update(group_id, current_size, max_size)
+            )
         except Exception as e:
             logger.error(f"Error in sync notification: {e}")
-    
+
     def notify_group_ready_sync(
         self,
         group_id: int,
@@ -249,30 +291,18 @@ class NotificationService:
     ):
         """Sync wrapper for notify_group_ready"""
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                asyncio.create_task(
-                    self.notify_group_ready(group_id, qr_code, passenger_count)
-                )
-            else:
-                asyncio.run(
-                    self.notify_group_ready(group_id, qr_code, passenger_count)
-                )
+            self._schedule(
+                self.notify_group_ready(group_id, qr_code, passenger_count)
+            )
         except Exception as e:
             logger.error(f"Error in sync notification: {e}")
-    
+
     def notify_group_waiting_sync(self, group_id: int, message: str):
         """Sync wrapper for notify_group_waiting"""
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                asyncio.create_task(
-                    self.notify_group_waiting(group_id, message)
-                )
-            else:
-                asyncio.run(
-                    self.notify_group_waiting(group_id, message)
-                )
+            self._schedule(
+                self.notify_group_waiting(group_id, message)
+            )
         except Exception as e:
             logger.error(f"Error in sync notification: {e}")
 
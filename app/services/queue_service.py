@@ -8,15 +8,35 @@ from sqlalchemy import and_, or_
 from typing import Optional, Dict, List
 from datetime import datetime
 import logging
+import time
 
-from app.models.ride_group import RideGroup, GroupStatus, GroupMember
-from app.models.booking_request import BookingRequest
+from app.models.ride_group import (
+    RideGroup, GroupStatus, GroupMember, RequestStatus, BookingRequest
+)
 from app.models.user import User
-from app.models.driver import Route
-from app.services.notification_service import NotificationService
+from app.ai.historical_learner import HistoricalLearner
+from app.services.notification_service import get_notification_service
 
 logger = logging.getLogger(__name__)
 
+# Short-lived in-process cache for forming-group listings. Many users
+# on the same route poll /queue/nearby-groups within seconds of each
+# other; a few seconds of staleness is invisible to them but removes
+# the repeated identical queries. Cleared whenever this service
+# changes group state; scheduler-side dispatches age out via the TTL.
+# Maps route_id (or None for "all") -> (expires_at, payload)
+_FORMING_GROUPS_CACHE: Dict[Optional[int], tuple] = {}
+_FORMING_GROUPS_CACHE_TTL_SECONDS = 3.0
+
+
+def _invalidate_forming_groups_cache():
+    _FORMING_GROUPS_CACHE.clear()
+
+
+# Arrival predictions keyed by (route_id, wall-clock minute) - they
+# can't change within the minute, so polls share one computation
+_PREDICTION_CACHE: Dict = {}
+
 
 class QueueService:
     """
@@ -25,7 +45,7 @@ class QueueService:
     
     def __init__(self, db: Session):
         self.db = db
-        self.notification_service = NotificationService()
+        self.notification_service = get_notification_service()
     
     def join_queue(
         self,
@@ -55,7 +75,9 @@ class QueueService:
         if not user:
             raise ValueError("User not found")
         
-        route = self.db.query(Route).filter(Route.id == route_id).first()
+        # Routes are quasi-immutable - served from the process cache
+        from app.services.route_cache import get_route
+        route = get_route(route_id)
         if not route or not route.is_active:
             raise ValueError("Route not found or inactive")
         
@@ -63,7 +85,7 @@ class QueueService:
         existing_booking = self.db.query(BookingRequest).filter(
             and_(
                 BookingRequest.user_id == user_id,
-                BookingRequest.request_status == "SEARCHING"
+                BookingRequest.request_status == RequestStatus.SEARCHING
             )
         ).first()
         
@@ -77,7 +99,7 @@ class QueueService:
             request_lat=user_lat,
             request_lng=user_lng,
             women_only_preference=women_only,
-            request_status="SEARCHING"
+            request_status=RequestStatus.SEARCHING
         )
         self.db.add(booking)
         self.db.commit()
@@ -85,32 +107,45 @@ class QueueService:
         
         logger.info(f"Booking {booking.id} created for user {user_id}")
         
-        # Try to find or create a matching group
-        group = self._find_or_create_group(
-            user=user,
-            route=route,
-            booking=booking,
-            women_only=women_only
-        )
-        
-        # Add user to group
-        result = self._add_user_to_group(
-            user=user,
-            group=group,
-            booking=booking,
-            user_lat=user_lat,
-            user_lng=user_lng
-        )
-        
+        # Try to find or create a matching group; if a concurrent
+        # joiner fills the chosen group before our seat claim lands,
+        # rematch and try again
+        result = None
+        for _ in range(3):
+            group = self._find_or_create_group(
+                user=user,
+                route=route,
+                booking=booking,
+                women_only=women_only
+            )
+
+            # Add user to group
+            result = self._add_user_to_group(
+                user=user,
+                group=group,
+                route=route,
+                booking=booking,
+                user_lat=user_lat,
+                user_lng=user_lng
+            )
+            if result is not None:
+                break
+
+        if result is None:
+            raise ValueError("Groups are filling fast - please try again")
+
+        # Group state changed - drop cached listings
+        _invalidate_forming_groups_cache()
+
         # Notify other group members
         self._notify_group_update(group)
-        
+
         return result
     
     def _find_or_create_group(
         self,
         user: User,
-        route: Route,
+        route,
         booking: BookingRequest,
         women_only: bool
     ) -> RideGroup:
@@ -119,35 +154,28 @@ class QueueService:
         Finds an existing group or creates a new one
         """
         
-        # Find suitable existing groups
-        query = self.db.query(RideGroup).filter(
+        # Gender filter: women can only join women-only groups, men
+        # only mixed ones
+        wants_women_only = women_only or user.gender == "FEMALE"
+
+        # Best match straight from SQL: fullest non-full group first,
+        # one row transferred. SKIP LOCKED lets concurrent joiners grab
+        # different groups instead of queueing on the same row.
+        group = self.db.query(RideGroup).filter(
             and_(
                 RideGroup.route_id == route.id,
                 RideGroup.group_status == GroupStatus.FORMING,
-                RideGroup.current_size < RideGroup.max_size
+                RideGroup.current_size < RideGroup.max_size,
+                RideGroup.women_only == wants_women_only
             )
-        )
-        
-        # Gender filter
-        if women_only or user.gender == "FEMALE":
-            # Women can only join women-only groups
-            query = query.filter(RideGroup.women_only == True)
-        else:
-            # Men can only join mixed groups
-            query = query.filter(RideGroup.women_only == False)
-        
-        existing_groups = query.all()
-        
-        # Find best match (prioritize groups closer to full)
-        if existing_groups:
-            # Sort by size (descending) - fill up existing groups first
-            existing_groups.sort(key=lambda g: g.current_size, reverse=True)
-            
-            for group in existing_groups:
-                if group.can_accept_user(user):
-                    logger.info(f"Found existing group {group.id} for user {user.id}")
-                    return group
-        
+        ).order_by(
+            RideGroup.current_size.desc()
+        ).with_for_update(skip_locked=True).first()
+
+        if group:
+            logger.info(f"Found existing group {group.id} for user {user.id}")
+            return group
+
         # No suitable group found, create new one
         new_group = RideGroup(
             route_id=route.id,
@@ -169,17 +197,36 @@ class QueueService:
         self,
         user: User,
         group: RideGroup,
+        route,
         booking: BookingRequest,
         user_lat: float,
         user_lng: float
     ) -> Dict:
         """
         Add user to group and update all records
+
+        Returns None when the group filled concurrently (caller rematches)
         """
-        
-        # Assign seat number
-        seat_number = group.current_size + 1
-        
+        from sqlalchemy import text
+
+        # Atomically claim a seat: the WHERE re-checks capacity so two
+        # concurrent joiners can't both read size 3 and take seat 4
+        claimed = self.db.execute(text(
+            "UPDATE ride_groups "
+            "SET current_size = current_size + 1, "
+            "    first_user_joined_at = COALESCE(first_user_joined_at, CURRENT_TIMESTAMP) "
+            "WHERE id = :gid AND current_size < max_size "
+            "RETURNING current_size"
+        ), {"gid": group.id}).first()
+
+        if claimed is None:
+            # Group filled between match and claim
+            self.db.rollback()
+            logger.info(f"Group {group.id} filled before user {user.id} could claim a seat")
+            return None
+
+        seat_number = new_size = claimed[0]
+
         # Create group member record
         member = GroupMember(
             group_id=group.id,
@@ -189,24 +236,19 @@ class QueueService:
             seat_number=seat_number
         )
         self.db.add(member)
-        
-        # Update group
-        group.current_size += 1
-        if group.first_user_joined_at is None:
-            group.first_user_joined_at = datetime.utcnow()
-        
+
         # Update booking request
         booking.group_id = group.id
-        booking.request_status = "GROUPED"
+        booking.request_status = RequestStatus.GROUPED
         booking.grouped_at = datetime.utcnow()
-        
+
         self.db.commit()
-        
+
         logger.info(
             f"User {user.id} added to group {group.id} "
-            f"(seat {seat_number}, size now {group.current_size}/{group.max_size})"
+            f"(seat {seat_number}, size now {new_size}/{group.max_size})"
         )
-        
+
         # Calculate estimated wait time
         estimated_wait = self._estimate_wait_time(group)
         
@@ -215,16 +257,16 @@ class QueueService:
             'booking_id': booking.id,
             'group_id': group.id,
             'group_status': group.group_status.value,
-            'current_size': group.current_size,
+            'current_size': new_size,
             'max_size': group.max_size,
             'seat_number': seat_number,
             'position_in_queue': seat_number,
             'estimated_wait_mins': estimated_wait,
             'women_only': group.women_only,
             'route': {
-                'origin': group.route.origin_name,
-                'destination': group.route.destination_name,
-                'distance_km': group.route.distance_km
+                'origin': route.origin_name,
+                'destination': route.destination_name,
+                'distance_km': route.distance_km
             }
         }
     
@@ -240,8 +282,8 @@ class QueueService:
             and_(
                 BookingRequest.user_id == user_id,
                 or_(
-                    BookingRequest.request_status == "SEARCHING",
-                    BookingRequest.request_status == "GROUPED"
+                    BookingRequest.request_status == RequestStatus.SEARCHING,
+                    BookingRequest.request_status == RequestStatus.GROUPED
                 )
             )
         ).first()
@@ -279,9 +321,12 @@ class QueueService:
                         self._notify_group_update(group)
         
         # Cancel booking
-        booking.request_status = "CANCELLED"
+        booking.request_status = RequestStatus.CANCELLED
         self.db.commit()
-        
+
+        # Group state changed - drop cached listings
+        _invalidate_forming_groups_cache()
+
         return {
             'success': True,
             'message': 'You have left the queue'
@@ -296,7 +341,7 @@ class QueueService:
         booking = self.db.query(BookingRequest).filter(
             and_(
                 BookingRequest.user_id == user_id,
-                BookingRequest.request_status.in_(["SEARCHING", "GROUPED"])
+                BookingRequest.request_status.in_([RequestStatus.SEARCHING, RequestStatus.GROUPED])
             )
         ).first()
         
@@ -308,27 +353,29 @@ class QueueService:
         
         # Get group details
         if booking.group_id:
-            group = self.db.query(RideGroup).filter(
+            from sqlalchemy.orm import joinedload, selectinload
+
+            # Eager-load route, members and just the user fields the
+            # response reads - the old member/user loads were N+1
+            group = self.db.query(RideGroup).options(
+                joinedload(RideGroup.route),
+                selectinload(RideGroup.members)
+                .selectinload(GroupMember.user)
+                .load_only(User.full_name, User.gender)
+            ).filter(
                 RideGroup.id == booking.group_id
             ).first()
-            
+
             if group:
-                # Get member info
-                member = self.db.query(GroupMember).filter(
-                    and_(
-                        GroupMember.group_id == group.id,
-                        GroupMember.user_id == user_id
-                    )
-                ).first()
-                
-                # Get other members
-                other_members = self.db.query(GroupMember).filter(
-                    and_(
-                        GroupMember.group_id == group.id,
-                        GroupMember.user_id != user_id
-                    )
-                ).all()
-                
+                # Partition the already-loaded members in Python
+                member = None
+                other_members = []
+                for m in group.members:
+                    if m.user_id == user_id:
+                        member = m
+                    else:
+                        other_members.append(m)
+
                 return {
                     'in_queue': True,
                     'booking_id': booking.id,
@@ -368,16 +415,20 @@ class QueueService:
         Get all forming groups (admin/analytics endpoint)
         """
         
+        cached = _FORMING_GROUPS_CACHE.get(route_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
         query = self.db.query(RideGroup).filter(
             RideGroup.group_status == GroupStatus.FORMING
         )
-        
+
         if route_id:
             query = query.filter(RideGroup.route_id == route_id)
-        
+
         groups = query.all()
-        
-        return [
+
+        result = [
             {
                 'group_id': g.id,
                 'route': f"{g.route.origin_name} → {g.route.destination_name}",
@@ -389,6 +440,12 @@ class QueueService:
             }
             for g in groups
         ]
+
+        _FORMING_GROUPS_CACHE[route_id] = (
+            time.monotonic() + _FORMING_GROUPS_CACHE_TTL_SECONDS,
+            result
+        )
+        return result
     
     def _reassign_seat_numbers(self, group: RideGroup):
         """
@@ -397,30 +454,39 @@ class QueueService:
         members = self.db.query(GroupMember).filter(
             GroupMember.group_id == group.id
         ).order_by(GroupMember.joined_at).all()
-        
-        for idx, member in enumerate(members, start=1):
-            member.seat_number = idx
-        
+
+        # One bulk UPDATE instead of a statement per member
+        self.db.bulk_update_mappings(GroupMember, [
+            {'id': member.id, 'seat_number': idx}
+            for idx, member in enumerate(members, start=1)
+        ])
+
         self.db.commit()
     
     def _estimate_wait_time(self, group: RideGroup) -> int:
         """
         Estimate wait time in minutes based on AI predictions
         """
-        from app.ai.historical_learner import HistoricalLearner
-        from app.ai.proximity_analyzer import ProximityAnalyzer
-        
+
         # If group is full, minimal wait
         if group.is_full():
             return 1
-        
-        # Get AI prediction
-        learner = HistoricalLearner(self.db)
-        prediction = learner.predict_next_arrival_time(
-            route_id=group.route_id,
-            current_time=datetime.utcnow()
-        )
-        
+
+        # Get AI prediction - stable within a minute, so polls and
+        # joins on the same route share one computed result
+        cache_key = (group.route_id, int(time.time() // 60))
+        if cache_key in _PREDICTION_CACHE:
+            prediction = _PREDICTION_CACHE[cache_key]
+        else:
+            learner = HistoricalLearner(self.db)
+            prediction = learner.predict_next_arrival_time(
+                route_id=group.route_id,
+                current_time=datetime.utcnow()
+            )
+            if len(_PREDICTION_CACHE) > 256:
+                _PREDICTION_CACHE.clear()
+            _PREDICTION_CACHE[cache_key] = prediction
+
         if prediction:
             # Convert to minutes
             return max(1, prediction['estimated_arrival_seconds'] // 60)
@@ -437,7 +503,7 @@ class QueueService:
         """
         Send WebSocket notification to all group members
         """
-        self.notification_service.notify_group_update(
+        self.notification_service.notify_group_update_sync(
             group_id=group.id,
             current_size=group.current_size,
             max_size=group.max_size
@@ -0,0 +1,63 @@
+"""
+Route Cache
+Process-local cache for quasi-immutable Route rows
+"""
+
+from collections import namedtuple
+from typing import Optional
+import time
+import logging
+
+from sqlalchemy import select
+
+from app.database.session import SessionLocal
+from app.models.driver import Route
+
+logger = logging.getLogger(__name__)
+
+# Routes change only through admin seeding, but they're read on every
+# booking, dispatch decision and dashboard render. Serve them as frozen
+# tuples (no ORM instance state) from process memory with a short TTL.
+ROUTE_CACHE_TTL_SECONDS = 60.0
+
+CachedRoute = namedtuple('CachedRoute', [
+    'id', 'route_code', 'origin_name', 'destination_name',
+    'origin_lat', 'origin_lng', 'dest_lat', 'dest_lng',
+    'distance_km', 'estimated_duration_mins', 'halfway_point_km',
+    'short_route_fare', 'full_route_fare', 'avg_wait_time_seconds',
+    'is_active'
+])
+
+# route_id -> (expires_at, CachedRoute | None)
+_cache: dict = {}
+
+
+def get_route(route_id: int) -> Optional[CachedRoute]:
+    """
+    Fetch a route as a frozen tuple, from cache when fresh
+    Returns None for unknown route ids
+    """
+    cached = _cache.get(route_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    with SessionLocal() as db:
+        row = db.execute(
+            select(
+                Route.id, Route.route_code, Route.origin_name,
+                Route.destination_name, Route.origin_lat, Route.origin_lng,
+                Route.dest_lat, Route.dest_lng, Route.distance_km,
+                Route.estimated_duration_mins, Route.halfway_point_km,
+                Route.short_route_fare, Route.full_route_fare,
+                Route.avg_wait_time_seconds, Route.is_active
+            ).where(Route.id == route_id)
+        ).first()
+
+    route = CachedRoute(*row) if row else None
+    _cache[route_id] = (time.monotonic() + ROUTE_CACHE_TTL_SECONDS, route)
+    return route
+
+
+def invalidate_route_cache():
+    """Drop all cached routes (call after route mutations)"""
+    _cache.clear()
@@ -6,6 +6,14 @@ Distance calculations, proximity checks, etc.
 import math
 from typing import Tuple
 
+import numpy as np
+
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
 
 def calculate_distance(
     lat1: float,
@@ -47,6 +55,51 @@ def calculate_distance(
     return int(distance)
 
 
+def calculate_distances_batch(
+    lat1: float,
+    lng1: float,
+    lats: np.ndarray,
+    lngs: np.ndarray
+) -> np.ndarray:
+    """
+    Haversine distances from one origin to many points
+
+    Args:
+        lat1, lng1: Fixed origin coordinate
+        lats, lngs: float64 arrays of target coordinates
+
+    Returns:
+        float64 array of distances in meters
+    """
+
+    EARTH_RADIUS = 6371000.0
+
+    lat1_rad = math.radians(lat1)
+    cos_lat1 = math.cos(lat1_rad)
+
+    dlat = np.radians(lats) - lat1_rad
+    dlng = np.radians(lngs - lng1)
+
+    a = (
+        np.sin(dlat / 2) ** 2 +
+        cos_lat1 * np.cos(np.radians(lats)) *
+        np.sin(dlng / 2) ** 2
+    )
+
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
+if _NUMBA_AVAILABLE:
+    # LLVM auto-vectorizes the trig loop; cache=True avoids recompiling
+    # on every process start
+    calculate_distance = njit(cache=True)(calculate_distance)
+    calculate_distances_batch = njit(fastmath=True, cache=True)(calculate_distances_batch)
+
+    # Pre-warm the compiles so the first request doesn't pay for them
+    calculate_distance(0.0, 0.0, 0.0, 0.0)
+    calculate_distances_batch(0.0, 0.0, np.zeros(1), np.zeros(1))
+
+
 def is_within_radius(
     center_lat: float,
     center_lng: float,
@@ -83,7 +83,12 @@ def register_events():
         
         if not all([driver_id, lat, lng]):
             return
-        
+
+        # Buffer the position for the periodic bulk write - no DB work
+        # on the per-ping path
+        from app.services.location_buffer import record_location
+        record_location(driver_id, lat, lng)
+
         # Broadcast to assigned group
         group_id = data.get('group_id')
         if group_id:
@@ -0,0 +1,286 @@
+"""
+Service-level tests
+Covers the atomic seat claim / rematch flow and notification batching
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+import app.database.session as db_session_module
+from app.database.base import Base
+import app.models  # noqa: F401 - registers tables on Base.metadata
+from app.models.driver import Route
+from app.models.user import User
+from app.models.ride_group import RideGroup, BookingRequest
+from app.services.notification_service import NotificationService
+from app.services.queue_service import QueueService
+
+
+@pytest.fixture
+def db_session():
+    """
+    Fresh in-memory database per test
+
+    Also points the app-wide SessionLocal at the test engine so the
+    process-local caches (route cache, ...) read the same database,
+    and clears those caches between tests.
+    """
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+
+    TestSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db_session_module.SessionLocal.configure(bind=engine)
+
+    _clear_process_caches()
+
+    session = TestSession()
+    try:
+        yield session
+    finally:
+        session.close()
+        _clear_process_caches()
+        engine.dispose()
+
+
+def _clear_process_caches():
+    """Reset module-level caches that would leak state across tests"""
+    from app.ai.historical_learner import _ARRIVAL_PROB_CACHE
+    from app.services.queue_service import _FORMING_GROUPS_CACHE, _PREDICTION_CACHE
+    from app.services.route_cache import _cache as route_cache
+
+    for cache in (_ARRIVAL_PROB_CACHE, _FORMING_GROUPS_CACHE,
+                  _PREDICTION_CACHE, route_cache):
+        cache.clear()
+
+
+@pytest.fixture
+def setup_test_data(db_session):
+    """One active route and five male users"""
+
+    route = Route(
+        route_code="TEST_SVC_1",
+        origin_name="Test Origin",
+        destination_name="Test Destination",
+        origin_lat=28.6139,
+        origin_lng=77.2090,
+        dest_lat=28.6289,
+        dest_lng=77.2265,
+        distance_km=5.0,
+        estimated_duration_mins=15,
+        halfway_point_km=2.5,
+        short_route_fare=30.0,
+        full_route_fare=50.0,
+        is_active=True
+    )
+    db_session.add(route)
+
+    users = []
+    for i in range(5):
+        user = User(
+            firebase_uid=f"svc_user_{i}",
+            phone_number=f"9876501{i:03d}",
+            full_name=f"Service User {i+1}",
+            gender="MALE",
+            is_active=True
+        )
+        db_session.add(user)
+        users.append(user)
+
+    db_session.commit()
+
+    return {'route': route, 'users': users}
+
+
+class TestAtomicSeatClaim:
+    """Test the UPDATE ... RETURNING seat claim and rematch loop"""
+
+    def test_seats_assigned_from_claimed_size(self, db_session, setup_test_data):
+        """
+        Test: Sequential joins get seats 1-4 from the atomic counter
+        """
+        route = setup_test_data['route']
+        users = setup_test_data['users']
+
+        queue_service = QueueService(db_session)
+
+        for expected_seat, user in enumerate(users[:4], start=1):
+            result = queue_service.join_queue(
+                user_id=user.id,
+                route_id=route.id,
+                user_lat=28.6140,
+                user_lng=77.2091,
+                women_only=False
+            )
+
+            assert result['seat_number'] == expected_seat
+            assert result['current_size'] == expected_seat
+
+    def test_claim_fails_when_group_fills_concurrently(self, db_session, setup_test_data):
+        """
+        Test: A group filled between match and claim is not overfilled
+        Simulates the losing side of the race by filling the group
+        out-of-band right before the claim runs
+        """
+        route = setup_test_data['route']
+        users = setup_test_data['users']
+
+        queue_service = QueueService(db_session)
+
+        result = queue_service.join_queue(
+            user_id=users[0].id,
+            route_id=route.id,
+            user_lat=28.6140,
+            user_lng=77.2091,
+            women_only=False
+        )
+        group_id = result['group_id']
+
+        # A concurrent joiner fills the group before our claim lands
+        db_session.execute(
+            text("UPDATE ride_groups SET current_size = max_size WHERE id = :gid"),
+            {"gid": group_id}
+        )
+        db_session.commit()
+
+        group = db_session.query(RideGroup).filter(RideGroup.id == group_id).first()
+        booking = BookingRequest(
+            user_id=users[1].id,
+            route_id=route.id,
+            request_lat=28.6140,
+            request_lng=77.2091
+        )
+        db_session.add(booking)
+        db_session.commit()
+
+        claimed = queue_service._add_user_to_group(
+            user=users[1],
+            group=group,
+            route=group.route,
+            booking=booking,
+            user_lat=28.6140,
+            user_lng=77.2091
+        )
+
+        assert claimed is None, "Full group must reject the claim"
+
+        db_session.expire_all()
+        group = db_session.query(RideGroup).filter(RideGroup.id == group_id).first()
+        assert group.current_size == group.max_size, "Group must not overfill"
+
+    def test_rematch_after_losing_the_race(self, db_session, setup_test_data):
+        """
+        Test: A joiner whose matched group fills concurrently lands in
+        a fresh group on the retry instead of erroring
+        """
+        route = setup_test_data['route']
+        users = setup_test_data['users']
+
+        queue_service = QueueService(db_session)
+
+        result = queue_service.join_queue(
+            user_id=users[0].id,
+            route_id=route.id,
+            user_lat=28.6140,
+            user_lng=77.2091,
+            women_only=False
+        )
+        first_group_id = result['group_id']
+
+        # Fill the first group the moment it gets matched
+        original_find = queue_service._find_or_create_group
+        state = {'sabotaged': False}
+
+        def find_and_fill(**kwargs):
+            group = original_find(**kwargs)
+            if not state['sabotaged'] and group.id == first_group_id:
+                state['sabotaged'] = True
+                db_session.execute(
+                    text("UPDATE ride_groups SET current_size = max_size WHERE id = :gid"),
+                    {"gid": group.id}
+                )
+                db_session.commit()
+            return group
+
+        queue_service._find_or_create_group = find_and_fill
+
+        result2 = queue_service.join_queue(
+            user_id=users[1].id,
+            route_id=route.id,
+            user_lat=28.6140,
+            user_lng=77.2091,
+            women_only=False
+        )
+
+        assert result2['group_id'] != first_group_id, "Loser must rematch to a new group"
+        assert result2['seat_number'] == 1
+
+    def test_gives_up_after_three_failed_claims(self, db_session, setup_test_data):
+        """
+        Test: Persistent claim failures surface as a ValueError
+        """
+        route = setup_test_data['route']
+        users = setup_test_data['users']
+
+        queue_service = QueueService(db_session)
+        queue_service._add_user_to_group = lambda **kwargs: None
+
+        with pytest.raises(ValueError):
+            queue_service.join_queue(
+                user_id=users[0].id,
+                route_id=route.id,
+                user_lat=28.6140,
+                user_lng=77.2091,
+                women_only=False
+            )
+
+
+class TestNotificationCoalescing:
+    """Test that burst group updates collapse into one emit"""
+
+    class FakeSio:
+        def __init__(self):
+            self.emits = []
+
+        async def emit(self, event, data, room=None):
+            self.emits.append((event, data, room))
+
+    @pytest.mark.asyncio
+    async def test_burst_updates_emit_once_with_latest_state(self):
+        """
+        Test: Four rapid updates to one group produce a single emit
+        carrying the final state
+        """
+        service = NotificationService()
+        sio = self.FakeSio()
+        service.set_socketio(sio)
+
+        for size in (1, 2, 3, 4):
+            await service.notify_group_update(group_id=7, current_size=size, max_size=4)
+
+        await asyncio.sleep(service.COALESCE_WINDOW_SECONDS * 3)
+
+        assert len(sio.emits) == 1
+        event, data, room = sio.emits[0]
+        assert event == 'group_update'
+        assert data['current_size'] == 4
+        assert room == 'group_7'
+
+    @pytest.mark.asyncio
+    async def test_separate_groups_each_get_an_emit(self):
+        """
+        Test: Coalescing is per room, not global
+        """
+        service = NotificationService()
+        sio = self.FakeSio()
+        service.set_socketio(sio)
+
+        await service.notify_group_update(group_id=1, current_size=2, max_size=4)
+        await service.notify_group_update(group_id=2, current_size=3, max_size=4)
+
+        await asyncio.sleep(service.COALESCE_WINDOW_SECONDS * 3)
+
+        assert len(sio.emits) == 2
+        assert {room for _, _, room in sio.emits} == {'group_1', 'group_2'}